@@ -1,16 +1,26 @@
 import asyncio
 import copy
+import hashlib
 import json
-from dataclasses import dataclass
+import logging
+import os
+import re
+import time
+from dataclasses import dataclass, field
 from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple, TypedDict
 
+from langchain_core.runnables import RunnableConfig
 from langgraph.graph import END, START, StateGraph
 
 from app.schemas import REQUIREMENTS_TEMPLATE
-from app.services.llm_adapter import LLM
+from app.services.deadline import Deadline, llm_kwargs
+from app.services.llm_adapter import LLM, LLMTimeout
+from app.services.requirements_merge import RequirementsDocument
+from app.services.team_cache import TeamPlanCache
 from app.templates.requirements_doc import render_requirements_markdown
 from app.templates.execution_plan import render_execution_markdown
 
+logger = logging.getLogger(__name__)
 
 TEAM_PROMPT = """You are the Team Designer for the AI Swarm Arena.
 Given a structured project brief (JSON), design the optimal planning crew.
@@ -46,6 +56,29 @@ AGGREGATOR_PROMPT = """You are the Aggregator agent. Combine the shared brief an
 Focus on technical feasibility, architecture, APIs, data, and testing. Do not repeat conversation logs.
 """
 
+ROUND_CONSOLIDATION_PROMPT = """You are the Aggregator agent keeping a running technical requirements JSON for a multi-agent debate.
+You receive the current running document and ONLY the notes produced in the latest round.
+Fold the new round into the document using this schema:
+{schema}
+Deduplicate lists, resolve contradictions in favour of the latest round, and return the complete updated document.
+"""
+
+INCREMENTAL_AGGREGATOR_PROMPT = """You are the Aggregator agent. The debate has already been consolidated round by round.
+Using the brief summary, the per-round digest, and the running requirements document, produce the final technical requirements JSON using this schema:
+{schema}
+Focus on technical feasibility, architecture, APIs, data, and testing. Do not repeat conversation logs.
+"""
+
+DIGEST_LINE_LIMIT = 160
+
+# Deadline-aware planning: below these budgets a stage switches to its local fallback.
+DEADLINE_TEAM_DESIGN_MIN_SECONDS = 20.0
+DEADLINE_EXECUTION_PLAN_MIN_SECONDS = 5.0
+# Typical completion sizes, shrunk by Deadline.max_tokens as the budget drains.
+AGENT_REPLY_TOKENS = 400
+EXTRACTION_TOKENS = 1500
+PLAN_TOKENS = 2500
+
 EXECUTION_PLAN_PROMPT = """You are the Build Orchestrator. Turn the following context into an actionable execution plan the delivery team can follow.
 Context:
 - Project Brief: {brief_summary}
@@ -74,14 +107,44 @@ Rules:
 - Write definition_of_done so a single engineer can verify completion.
 """
 
+EXECUTION_PLAN_REVISION_PROMPT = """You are the Build Orchestrator. An execution plan was drafted from a preliminary requirements snapshot.
+The final requirements changed only in the sections listed under "changed_requirements".
+Revise ONLY the phases affected by those changes and return STRICT minified JSON:
+{"phases": [...], "tech_stack": {...}, "risks": [...]}
+- "phases" holds only the revised or newly added phases, each keeping the original phase "name" when revising it.
+- Include "tech_stack" or "risks" only if the changes require updating them.
+Use the same phase/task shape as the existing plan.
+"""
+
+# Requirement sections whose drift invalidates a speculative execution plan.
+MATERIAL_REQUIREMENT_PATHS = [
+    ("project", "title"),
+    ("product", "features"),
+    ("product", "user_journeys"),
+    ("technical", "platform"),
+    ("technical", "stack_preferences"),
+    ("technical", "integrations"),
+    ("technical", "data_model_hints"),
+    ("technical", "ai_requirements"),
+    ("technical", "security"),
+    ("technical", "hosting"),
+    ("constraints", "dependencies"),
+    ("acceptance", "deliverables"),
+]
+
 
 class AgentState(TypedDict, total=False):
     brief: Dict[str, Any]
     history: List[Dict[str, Any]]
     requirements: Dict[str, Any]
+    requirements_doc: RequirementsDocument
     round: int
     max_rounds: int
     team_plan: Dict[str, Any]
+    digest: List[str]
+    round_messages: List[Dict[str, Any]]
+    deadline: Optional[Deadline]
+    round_seconds: float
 
 
 def _slugify(text: str) -> str:
@@ -116,16 +179,106 @@ def _summarize_brief(brief: Dict[str, Any]) -> str:
     return " \n".join(lines)
 
 
+def _prune_empty(value: Any) -> Any:
+    if isinstance(value, dict):
+        pruned = {k: _prune_empty(v) for k, v in value.items()}
+        return {k: v for k, v in pruned.items() if v not in (None, "", [], {})}
+    if isinstance(value, list):
+        return [v for v in (_prune_empty(v) for v in value) if v not in (None, "", [], {})]
+    return value
+
+
+def _normalize_text(value: Any) -> str:
+    return " ".join(str(value).lower().split()).strip(" .;,")
+
+
+def _brief_fingerprint(brief: Dict[str, Any], rounds_override: Optional[int] = None) -> str:
+    """Hash of the brief fields `_summarize_brief` surfaces to the team designer (minus free text)."""
+    project = brief.get("project") or {}
+    product = brief.get("product") or {}
+    tech = brief.get("technical") or {}
+
+    def _items(values: Any) -> List[str]:
+        if not isinstance(values, list):
+            values = [values] if values else []
+        return sorted({_normalize_text(v) for v in values if v})
+
+    salient = {
+        "title": _normalize_text(project.get("title") or ""),
+        "features": _items(product.get("features")),
+        "stack": _items(tech.get("stack_preferences")),
+        "ai": _items(tech.get("ai_requirements")),
+        "integrations": _items(tech.get("integrations")),
+        "rounds": rounds_override,
+    }
+    encoded = json.dumps(salient, sort_keys=True, default=str).encode("utf-8")
+    return hashlib.sha256(encoded).hexdigest()
+
+
+def _normalize_item(item: Any) -> str:
+    item = _prune_empty(item)
+    if item in (None, "", [], {}):
+        return ""
+    text = json.dumps(item, sort_keys=True) if isinstance(item, (dict, list)) else str(item)
+    return " ".join(re.findall(r"[a-z0-9]+", text.lower()))
+
+
+def _material_changes(before: Dict[str, Any], after: Dict[str, Any], tolerance: float) -> Dict[str, Any]:
+    """Return the material requirement sections of `after` that drifted from `before`."""
+    changed: Dict[str, Any] = {}
+    for path in MATERIAL_REQUIREMENT_PATHS:
+        old, new = before, after
+        for key in path:
+            old = old.get(key) if isinstance(old, dict) else None
+            new = new.get(key) if isinstance(new, dict) else None
+        if isinstance(old, list) or isinstance(new, list):
+            old_items = {_normalize_item(i) for i in old or []}
+            new_items = {_normalize_item(i) for i in new or []}
+            union = old_items | new_items
+            similarity = len(old_items & new_items) / len(union) if union else 1.0
+            if similarity < tolerance:
+                changed[".".join(path)] = new
+        elif _normalize_item(old) != _normalize_item(new):
+            changed[".".join(path)] = new
+    return changed
+
+
+def _digest_line(message: Dict[str, Any]) -> str:
+    content = " ".join((message.get("content") or "").split())
+    if len(content) > DIGEST_LINE_LIMIT:
+        content = content[:DIGEST_LINE_LIMIT].rsplit(" ", 1)[0] + "…"
+    return f"R{message.get('round', '?')} {message.get('role', 'agent')}: {content}"
+
+
 @dataclass
 class TeamDesigner:
     llm: LLM
+    cache: Optional[TeamPlanCache] = field(default_factory=TeamPlanCache)
 
-    async def design_team(self, brief: Dict[str, Any], rounds_override: Optional[int] = None) -> Dict[str, Any]:
-        payload = {"brief": brief, "rounds_hint": rounds_override}
-        plan = await self.llm.extract_json(
-            TEAM_PROMPT,
-            conversation=[{"role": "user", "content": json.dumps(payload)}]
-        )
+    async def design_team(
+        self,
+        brief: Dict[str, Any],
+        rounds_override: Optional[int] = None,
+        use_cache: bool = True,
+        deadline: Optional[Deadline] = None,
+    ) -> Dict[str, Any]:
+        cache_key = _brief_fingerprint(brief, rounds_override) if self.cache is not None else None
+        if cache_key and use_cache:
+            cached = self.cache.get(cache_key)
+            if cached:
+                return cached
+        plan = None
+        if not deadline or deadline.remaining() >= DEADLINE_TEAM_DESIGN_MIN_SECONDS:
+            payload = {"brief": brief, "rounds_hint": rounds_override}
+            try:
+                plan = await self.llm.extract_json(
+                    TEAM_PROMPT,
+                    conversation=[{"role": "user", "content": json.dumps(payload)}],
+                    **llm_kwargs(deadline, EXTRACTION_TOKENS),
+                )
+            except LLMTimeout as exc:
+                logger.warning("Team design timed out, using fallback crew: %s", exc)
+        designed = bool(plan)
         if not plan:
             plan = self._fallback_plan(brief)
         plan["rounds"] = max(2, plan.get("rounds", rounds_override or 2))
@@ -145,8 +298,11 @@ class TeamDesigner:
             }
             agents.append(normalized)
         if not agents:
+            designed = False
             agents = self._fallback_plan(brief)["agents"]
         plan["agents"] = agents
+        if cache_key and designed:
+            self.cache.put(cache_key, plan)
         return plan
 
     def _fallback_plan(self, brief: Dict[str, Any]) -> Dict[str, Any]:
@@ -201,34 +357,27 @@ class TeamDesigner:
 
 
 class AgentRuntime:
-    def __init__(self, llm: LLM):
-        self.llm = llm
-
-    async def run(self, team_plan: Dict[str, Any], brief: Dict[str, Any], rounds_override: Optional[int] = None) -> Dict[str, Any]:
-        state_graph = StateGraph(AgentState)
-        state_graph.add_node("round_router", self._noop)
-        state_graph.add_conditional_edges(
-            "round_router",
-            lambda state: "done" if state["round"] >= state["max_rounds"] else "more",
-            {"done": "aggregator", "more": "agent_round"}
-        )
-        state_graph.add_node("agent_round", self._agent_round)
-        state_graph.add_edge("agent_round", "round_router")
-        state_graph.add_node("aggregator", self._aggregate)
-        state_graph.add_edge("aggregator", END)
-        state_graph.add_edge(START, "round_router")
+    AGGREGATION_MODES = ("full", "incremental")
 
-        compiled = state_graph.compile()
-        max_rounds = max(2, rounds_override or team_plan.get("rounds", 2))
-        initial_state: AgentState = {
-            "brief": brief,
-            "history": [],
-            "requirements": copy.deepcopy(REQUIREMENTS_TEMPLATE),
-            "round": 0,
-            "max_rounds": max_rounds,
-            "team_plan": team_plan,
-        }
-        return await compiled.ainvoke(initial_state)
+    def __init__(self, llm: LLM, aggregation_mode: Optional[str] = None):
+        self.llm = llm
+        mode = (aggregation_mode or os.getenv("SWARM_AGGREGATION_MODE", "full")).lower()
+        if mode not in self.AGGREGATION_MODES:
+            raise ValueError(f"Unknown aggregation mode {mode!r}; expected one of {self.AGGREGATION_MODES}.")
+        self.aggregation_mode = mode
+        # Time kept back for aggregation + execution plan when a deadline cuts rounds short.
+        self.deadline_tail_seconds = float(os.getenv("SWARM_DEADLINE_TAIL_SECONDS", "15"))
+        self.graph = self._build_graph()
+
+    async def run(
+        self,
+        team_plan: Dict[str, Any],
+        brief: Dict[str, Any],
+        rounds_override: Optional[int] = None,
+        on_rounds_complete: Optional[Callable[[AgentState], None]] = None,
+        deadline: Optional[Deadline] = None,
+    ) -> Dict[str, Any]:
+        return await self._drive(team_plan, brief, rounds_override, on_rounds_complete, deadline=deadline)
 
     async def run_stream(
         self,
@@ -236,6 +385,19 @@ class AgentRuntime:
         brief: Dict[str, Any],
         send_event: Callable[[Dict[str, Any]], Awaitable[None]],
         rounds_override: Optional[int] = None,
+        on_rounds_complete: Optional[Callable[[AgentState], None]] = None,
+        deadline: Optional[Deadline] = None,
+    ) -> Dict[str, Any]:
+        return await self._drive(team_plan, brief, rounds_override, on_rounds_complete, send_event, deadline)
+
+    async def _drive(
+        self,
+        team_plan: Dict[str, Any],
+        brief: Dict[str, Any],
+        rounds_override: Optional[int],
+        on_rounds_complete: Optional[Callable[[AgentState], None]],
+        send_event: Optional[Callable[[Dict[str, Any]], Awaitable[None]]] = None,
+        deadline: Optional[Deadline] = None,
     ) -> Dict[str, Any]:
         state: AgentState = {
             "brief": brief,
@@ -244,22 +406,53 @@ class AgentRuntime:
             "round": 0,
             "max_rounds": max(2, rounds_override or team_plan.get("rounds", 2)),
             "team_plan": team_plan,
+            "digest": [],
+            "round_messages": [],
+            "deadline": deadline,
+            "round_seconds": 0.0,
         }
-        while state["round"] < state["max_rounds"]:
-            updates, new_messages = await self._execute_round(state)
-            state.update(updates)
-            for message in new_messages:
-                await send_event({"type": "agent_message", "payload": message})
-            await send_event({"type": "round_complete", "payload": {"round": state["round"]}})
-        final_state = await self._aggregate(state)
-        state.update(final_state)
+        config = {"configurable": {"on_rounds_complete": on_rounds_complete}}
+        # Node updates are plain overwrites, so folding them in reproduces the graph's own state.
+        async for chunk in self.graph.astream(state, config=config, stream_mode="updates"):
+            for node, update in chunk.items():
+                state.update(update or {})
+                if node == "agent_round" and send_event:
+                    for message in update.get("round_messages", []):
+                        await send_event({"type": "agent_message", "payload": message})
+                    await send_event({"type": "round_complete", "payload": {"round": update["round"]}})
         return state
 
+    def _build_graph(self):
+        state_graph = StateGraph(AgentState)
+        state_graph.add_node("round_router", self._noop)
+        state_graph.add_conditional_edges(
+            "round_router",
+            self._route,
+            {"done": "aggregator", "more": "agent_round"}
+        )
+        state_graph.add_node("agent_round", self._agent_round)
+        state_graph.add_edge("agent_round", "round_router")
+        state_graph.add_node("aggregator", self._aggregate)
+        state_graph.add_edge("aggregator", END)
+        state_graph.add_edge(START, "round_router")
+        return state_graph.compile()
+
+    def _route(self, state: AgentState) -> str:
+        if state["round"] >= state["max_rounds"]:
+            return "done"
+        deadline = state.get("deadline")
+        if deadline and state["round"] > 0:
+            # Only start another round if it and the tail stages still fit in the budget.
+            if deadline.remaining() < state.get("round_seconds", 0.0) + self.deadline_tail_seconds:
+                logger.info("Deadline near; stopping debate after %s rounds", state["round"])
+                return "done"
+        return "more"
+
     async def _agent_round(self, state: AgentState) -> Dict[str, Any]:
-        updates, _ = await self._execute_round(state)
-        return updates
+        return await self._execute_round(state)
 
-    async def _execute_round(self, state: AgentState) -> Tuple[Dict[str, Any], List[Dict[str, Any]]]:
+    async def _execute_round(self, state: AgentState) -> Dict[str, Any]:
+        started = time.monotonic()
         round_idx = state["round"]
         team_plan = state["team_plan"]
         brief_summary = _summarize_brief(state["brief"])
@@ -270,28 +463,82 @@ class AgentRuntime:
         ]
         results = await asyncio.gather(*tasks)
         history = state["history"][:]
-        requirements = copy.deepcopy(state["requirements"])
+        document = self._document(state).fork()
         new_messages = []
         for res in results:
+            if not res["message"]:
+                continue
             history.append(res["message"])
             new_messages.append(res["message"])
-            self._merge(requirements, res.get("requirements") or {})
-        return {
+            document.merge(res.get("requirements") or {})
+        if self.aggregation_mode == "incremental":
+            consolidated = await self._consolidate_round(
+                brief_summary, document.data, new_messages, state.get("deadline")
+            )
+            if consolidated is not document.data:
+                document = RequirementsDocument(consolidated)
+        updates = {
             "history": history,
-            "requirements": requirements,
+            "requirements": document.data,
+            "requirements_doc": document,
             "round": round_idx + 1,
-        }, new_messages
+            "round_messages": new_messages,
+            "round_seconds": time.monotonic() - started,
+        }
+        if self.aggregation_mode == "incremental":
+            updates["digest"] = (state.get("digest") or []) + [_digest_line(m) for m in new_messages]
+        return updates
 
-    async def _aggregate(self, state: AgentState) -> Dict[str, Any]:
+    async def _consolidate_round(
+        self,
+        brief_summary: str,
+        requirements: Dict[str, Any],
+        round_messages: List[Dict[str, Any]],
+        deadline: Optional[Deadline] = None,
+    ) -> Dict[str, Any]:
         payload = {
-            "brief": state["brief"],
-            "history": state["history"],
-            "current": state["requirements"],
+            "brief": brief_summary,
+            "round_notes": [{"role": m["role"], "content": m["content"]} for m in round_messages],
+            "current": requirements,
         }
-        requirements = await self.llm.extract_json(
-            AGGREGATOR_PROMPT.format(schema=REQUIREMENTS_TEMPLATE),
-            conversation=[{"role": "user", "content": json.dumps(payload)}]
-        ) or state["requirements"]
+        try:
+            consolidated = await self.llm.extract_json(
+                ROUND_CONSOLIDATION_PROMPT.format(schema=REQUIREMENTS_TEMPLATE),
+                conversation=[{"role": "user", "content": json.dumps(payload)}],
+                **llm_kwargs(deadline, EXTRACTION_TOKENS),
+            )
+        except LLMTimeout as exc:
+            logger.warning("Round consolidation timed out, keeping merged requirements: %s", exc)
+            return requirements
+        return consolidated if isinstance(consolidated, dict) and consolidated else requirements
+
+    async def _aggregate(self, state: AgentState, config: Optional[RunnableConfig] = None) -> Dict[str, Any]:
+        on_rounds_complete = ((config or {}).get("configurable") or {}).get("on_rounds_complete")
+        if on_rounds_complete:
+            on_rounds_complete(state)
+        if self.aggregation_mode == "incremental":
+            prompt = INCREMENTAL_AGGREGATOR_PROMPT
+            payload = {
+                "brief": _summarize_brief(state["brief"]),
+                "digest": state.get("digest") or [],
+                "current": state["requirements"],
+            }
+        else:
+            prompt = AGGREGATOR_PROMPT
+            payload = {
+                "brief": state["brief"],
+                "history": state["history"],
+                "current": state["requirements"],
+            }
+        try:
+            requirements = await self.llm.extract_json(
+                prompt.format(schema=REQUIREMENTS_TEMPLATE),
+                conversation=[{"role": "user", "content": json.dumps(payload)}],
+                **llm_kwargs(state.get("deadline"), EXTRACTION_TOKENS),
+            ) or state["requirements"]
+        except LLMTimeout as exc:
+            logger.warning("Aggregation timed out, keeping merged requirements: %s", exc)
+            requirements = state["requirements"]
         markdown = render_requirements_markdown(requirements, history=state["history"])
         return {"requirements": requirements, "markdown": markdown}
 
@@ -318,22 +565,33 @@ class AgentRuntime:
             "3. Specify any API endpoints, data fields, or stack choices relevant to your focus.\n"
             "4. Close with a short handoff suggestion for the next agent."
         )
-        reply = await self.llm.chat(
-            system=(
-                f"You are {agent['name']} - {agent.get('persona','an expert')} who contributes to a collaborative technical planning session. "
-                "Stay concise (<=200 words) yet specific."
-            ),
-            messages=[{"role": "user", "content": user_prompt}]
-        )
+        deadline = state.get("deadline")
+        try:
+            reply = await self.llm.chat(
+                system=(
+                    f"You are {agent['name']} - {agent.get('persona','an expert')} who contributes to a collaborative technical planning session. "
+                    "Stay concise (<=200 words) yet specific."
+                ),
+                messages=[{"role": "user", "content": user_prompt}],
+                **llm_kwargs(deadline, AGENT_REPLY_TOKENS),
+            )
+        except LLMTimeout as exc:
+            logger.warning("%s timed out in round %s: %s", agent["name"], round_idx + 1, exc)
+            return {"message": None, "requirements": {}}
         extraction_payload = {
             "agent": agent["name"],
             "note": reply,
             "brief": brief_summary,
         }
-        structured = await self.llm.extract_json(
-            AGENT_EXTRACTION_PROMPT.format(schema=REQUIREMENTS_TEMPLATE),
-            conversation=[{"role": "user", "content": json.dumps(extraction_payload)}]
-        ) or {}
+        try:
+            structured = await self.llm.extract_json(
+                AGENT_EXTRACTION_PROMPT.format(schema=REQUIREMENTS_TEMPLATE),
+                conversation=[{"role": "user", "content": json.dumps(extraction_payload)}],
+                **llm_kwargs(deadline, EXTRACTION_TOKENS),
+            ) or {}
+        except LLMTimeout as exc:
+            logger.warning("Extraction for %s timed out: %s", agent["name"], exc)
+            structured = {}
         return {
             "message": {
                 "role": agent["name"],
@@ -343,47 +601,82 @@ class AgentRuntime:
             "requirements": structured,
         }
 
-    def _merge(self, base: Dict[str, Any], updates: Dict[str, Any]):
-        for key, value in updates.items():
-            if isinstance(value, dict):
-                node = base.setdefault(key, {})
-                if isinstance(node, dict):
-                    self._merge(node, value)
-                else:
-                    base[key] = value
-            elif isinstance(value, list):
-                node = base.setdefault(key, [])
-                if isinstance(node, list):
-                    base[key] = self._merge_list(node, value)
-                else:
-                    base[key] = value
-            else:
-                base[key] = value
-
-    def _merge_list(self, existing: List[Any], incoming: List[Any]) -> List[Any]:
-        seen = set()
-        merged = []
-        for item in existing + incoming:
-            key = json.dumps(item, sort_keys=True) if isinstance(item, (dict, list)) else str(item)
-            if key in seen:
-                continue
-            seen.add(key)
-            merged.append(item)
-        return merged
+    def _document(self, state: AgentState) -> RequirementsDocument:
+        # Reuse the round's document (and its dedup index) unless the dict was swapped underneath it.
+        document = state.get("requirements_doc")
+        if document is not None and document.data is state["requirements"]:
+            return document
+        return RequirementsDocument(state["requirements"])
 
     def _noop(self, state: AgentState) -> Dict[str, Any]:
         # LangGraph nodes must emit at least one field; passthrough current round.
         return {"round": state.get("round", 0)}
 
 
+class SpeculativeExecutionPlan:
+    """Execution plan drafted from the last round's requirements while aggregation runs."""
+
+    def __init__(
+        self,
+        builder: "SwarmProjectBuilder",
+        team_plan: Dict[str, Any],
+        brief: Dict[str, Any],
+        deadline: Optional[Deadline] = None,
+    ):
+        self.builder = builder
+        self.team_plan = team_plan
+        self.brief = brief
+        self.deadline = deadline
+        self.requirements: Optional[Dict[str, Any]] = None
+        self.task: Optional[asyncio.Task] = None
+
+    def start(self, state: AgentState):
+        if self.task is not None:
+            return
+        self.requirements = state["requirements"]
+        self.task = asyncio.create_task(
+            self.builder._execution_plan(
+                self.team_plan, self.brief, state["requirements"], state["history"], self.deadline
+            )
+        )
+
+    async def result(self) -> Optional[Tuple[Dict[str, Any], str]]:
+        if self.task is None:
+            return None
+        try:
+            return await self.task
+        except Exception as exc:
+            logger.warning("Speculative execution plan failed: %s", exc)
+            return None
+
+    def discard(self):
+        if self.task is not None and not self.task.done():
+            self.task.cancel()
+
+
 class SwarmProjectBuilder:
-    def __init__(self):
-        self.llm = LLM()
+    def __init__(self, speculate: Optional[bool] = None, speculation_tolerance: Optional[float] = None):
+        self.llm = LLM(priority="planning")
         self.team_designer = TeamDesigner(self.llm)
         self.runtime = AgentRuntime(self.llm)
+        if speculate is None:
+            speculate = os.getenv("SWARM_SPECULATIVE_PLAN", "true").lower() == "true"
+        self.speculate = speculate
+        self.speculation_tolerance = speculation_tolerance or float(os.getenv("SWARM_SPECULATION_TOLERANCE", "0.75"))
 
-    async def plan_project(self, brief: Dict[str, Any], rounds: Optional[int] = None) -> Dict[str, Any]:
-        result = await self._run_core(brief, rounds=rounds)
+    async def plan_project(
+        self,
+        brief: Dict[str, Any],
+        rounds: Optional[int] = None,
+        bypass_team_cache: bool = False,
+        deadline_seconds: Optional[float] = None,
+    ) -> Dict[str, Any]:
+        result = await self._run_core(
+            brief,
+            rounds=rounds,
+            bypass_team_cache=bypass_team_cache,
+            deadline=Deadline.from_budget(deadline_seconds),
+        )
         return result
 
     async def plan_project_stream(
@@ -391,13 +684,30 @@ class SwarmProjectBuilder:
         brief: Dict[str, Any],
         send_event: Callable[[Dict[str, Any]], Awaitable[None]],
         rounds: Optional[int] = None,
+        bypass_team_cache: bool = False,
+        deadline_seconds: Optional[float] = None,
     ) -> Dict[str, Any]:
         if not brief:
             raise ValueError("Project brief is required to run the swarm planner.")
-        team_plan = await self.team_designer.design_team(brief, rounds_override=rounds)
+        deadline = Deadline.from_budget(deadline_seconds)
+        team_plan = await self.team_designer.design_team(
+            brief, rounds_override=rounds, use_cache=not bypass_team_cache, deadline=deadline
+        )
         await send_event({"type": "team_plan", "payload": team_plan})
-        runtime_state = await self.runtime.run_stream(team_plan, brief, send_event, rounds_override=rounds)
-        result = await self._build_outputs(team_plan, brief, runtime_state)
+        speculative = self._speculation(team_plan, brief, deadline)
+        try:
+            runtime_state = await self.runtime.run_stream(
+                team_plan,
+                brief,
+                send_event,
+                rounds_override=rounds,
+                on_rounds_complete=speculative.start if speculative else None,
+                deadline=deadline,
+            )
+            result = await self._build_outputs(team_plan, brief, runtime_state, speculative)
+        finally:
+            if speculative:
+                speculative.discard()
         await send_event({
             "type": "final_plan",
             "payload": {
@@ -409,18 +719,58 @@ class SwarmProjectBuilder:
         })
         return result
 
-    async def _run_core(self, brief: Dict[str, Any], rounds: Optional[int] = None) -> Dict[str, Any]:
+    async def _run_core(
+        self,
+        brief: Dict[str, Any],
+        rounds: Optional[int] = None,
+        bypass_team_cache: bool = False,
+        deadline: Optional[Deadline] = None,
+    ) -> Dict[str, Any]:
         if not brief:
             raise ValueError("Project brief is required to run the swarm planner.")
-        team_plan = await self.team_designer.design_team(brief, rounds_override=rounds)
-        runtime_state = await self.runtime.run(team_plan, brief, rounds_override=rounds)
-        return await self._build_outputs(team_plan, brief, runtime_state)
+        team_plan = await self.team_designer.design_team(
+            brief, rounds_override=rounds, use_cache=not bypass_team_cache, deadline=deadline
+        )
+        speculative = self._speculation(team_plan, brief, deadline)
+        try:
+            runtime_state = await self.runtime.run(
+                team_plan,
+                brief,
+                rounds_override=rounds,
+                on_rounds_complete=speculative.start if speculative else None,
+                deadline=deadline,
+            )
+            return await self._build_outputs(team_plan, brief, runtime_state, speculative)
+        finally:
+            if speculative:
+                speculative.discard()
+
+    def _speculation(
+        self,
+        team_plan: Dict[str, Any],
+        brief: Dict[str, Any],
+        deadline: Optional[Deadline] = None,
+    ) -> Optional[SpeculativeExecutionPlan]:
+        return SpeculativeExecutionPlan(self, team_plan, brief, deadline) if self.speculate else None
 
-    async def _build_outputs(self, team_plan: Dict[str, Any], brief: Dict[str, Any], runtime_state: Dict[str, Any]) -> Dict[str, Any]:
+    async def _build_outputs(
+        self,
+        team_plan: Dict[str, Any],
+        brief: Dict[str, Any],
+        runtime_state: Dict[str, Any],
+        speculative: Optional[SpeculativeExecutionPlan] = None,
+    ) -> Dict[str, Any]:
         requirements = runtime_state.get("requirements", {})
         md = runtime_state.get("markdown", "")
         history = runtime_state.get("history", [])
-        execution_plan, execution_md = await self._execution_plan(team_plan, brief, requirements, history)
+        deadline = runtime_state.get("deadline")
+        drafted = await speculative.result() if speculative else None
+        if drafted and drafted[0].get("phases"):
+            execution_plan, execution_md = await self._reconcile_execution_plan(
+                drafted[0], drafted[1], speculative.requirements, team_plan, brief, requirements, history, deadline
+            )
+        else:
+            execution_plan, execution_md = await self._execution_plan(team_plan, brief, requirements, history, deadline)
         return {
             "team_plan": team_plan,
             "debate_history": history,
@@ -436,7 +786,11 @@ class SwarmProjectBuilder:
         brief: Dict[str, Any],
         requirements: Dict[str, Any],
         history: List[Dict[str, Any]],
+        deadline: Optional[Deadline] = None,
     ) -> Tuple[Dict[str, Any], str]:
+        if deadline and deadline.remaining() < DEADLINE_EXECUTION_PLAN_MIN_SECONDS:
+            plan = self._fallback_execution_plan()
+            return plan, render_execution_markdown(plan)
         brief_summary = _summarize_brief(brief)
         debate_log = "\n".join(f"- Round {m.get('round', '?')}: {m['role']} — {m['content']}" for m in history)
         payload = {
@@ -444,19 +798,71 @@ class SwarmProjectBuilder:
             "brief_summary": brief_summary,
             "requirements": requirements,
         }
-        plan = await self.llm.extract_json(
-            EXECUTION_PLAN_PROMPT.format(
-                brief_summary=brief_summary,
-                requirements_json=json.dumps(requirements),
-                debate_log=debate_log or "No debate captured."
-            ),
-            conversation=[{"role": "user", "content": json.dumps(payload)}]
-        ) or {
+        try:
+            plan = await self.llm.extract_json(
+                EXECUTION_PLAN_PROMPT.format(
+                    brief_summary=brief_summary,
+                    requirements_json=json.dumps(requirements),
+                    debate_log=debate_log or "No debate captured."
+                ),
+                conversation=[{"role": "user", "content": json.dumps(payload)}],
+                **llm_kwargs(deadline, PLAN_TOKENS),
+            ) or self._fallback_execution_plan()
+        except LLMTimeout as exc:
+            logger.warning("Execution plan timed out, using fallback plan: %s", exc)
+            plan = self._fallback_execution_plan()
+        plan_md = render_execution_markdown(plan)
+        return plan, plan_md
+
+    def _fallback_execution_plan(self) -> Dict[str, Any]:
+        return {
             "overview": "High-level plan unavailable.",
             "tech_stack": {},
             "phases": [],
             "risks": [],
             "handoff_instructions": [],
         }
-        plan_md = render_execution_markdown(plan)
-        return plan, plan_md
+
+    async def _reconcile_execution_plan(
+        self,
+        draft: Dict[str, Any],
+        draft_md: str,
+        draft_requirements: Dict[str, Any],
+        team_plan: Dict[str, Any],
+        brief: Dict[str, Any],
+        requirements: Dict[str, Any],
+        history: List[Dict[str, Any]],
+        deadline: Optional[Deadline] = None,
+    ) -> Tuple[Dict[str, Any], str]:
+        changed = _material_changes(draft_requirements or {}, requirements, self.speculation_tolerance)
+        if not changed:
+            return draft, draft_md
+        if deadline and deadline.remaining() < DEADLINE_EXECUTION_PLAN_MIN_SECONDS:
+            return draft, draft_md
+        logger.info("Aggregation changed %s; revising speculative execution plan", ", ".join(changed))
+        payload = {"existing_plan": draft, "changed_requirements": changed}
+        try:
+            revision = await self.llm.extract_json(
+                EXECUTION_PLAN_REVISION_PROMPT,
+                conversation=[{"role": "user", "content": json.dumps(payload)}],
+                **llm_kwargs(deadline, PLAN_TOKENS),
+            )
+        except LLMTimeout as exc:
+            logger.warning("Execution plan revision timed out, keeping the draft: %s", exc)
+            return draft, draft_md
+        if not revision or not isinstance(revision.get("phases"), list):
+            return await self._execution_plan(team_plan, brief, requirements, history, deadline)
+        plan = copy.deepcopy(draft)
+        phases = plan.setdefault("phases", [])
+        positions = {phase.get("name"): idx for idx, phase in enumerate(phases)}
+        for phase in revision["phases"]:
+            if not isinstance(phase, dict):
+                continue
+            if phase.get("name") in positions:
+                phases[positions[phase["name"]]] = phase
+            else:
+                phases.append(phase)
+        for key in ("tech_stack", "risks"):
+            if revision.get(key):
+                plan[key] = revision[key]
+        return plan, render_execution_markdown(plan)
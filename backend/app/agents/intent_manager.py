@@ -2,7 +2,9 @@ import os
 import copy
 from typing import Tuple, Dict, Any
 from app.services.llm_adapter import LLM
+from app.services.llm_scheduler import llm_session
 from app.schemas import REQUIREMENTS_TEMPLATE
+from app.services.requirements_merge import RequirementsDocument
 
 SYSTEM_PROMPT = """You are an Intent Manager that scopes software projects in real time.
 Your job:
@@ -26,24 +28,25 @@ Keep arrays deduplicated.
 class IntentManager:
     def __init__(self, session_store):
         self.session_store = session_store
-        self.llm = LLM()
+        self.llm = LLM(priority="interactive")
 
     async def handle_user_message(self, session_id: str, message: str) -> Tuple[str, Dict[str, Any]]:
         state = self.session_store.get(session_id)
         history = state.setdefault("history", [])
         req_state = state.setdefault("requirements_state", copy.deepcopy(REQUIREMENTS_TEMPLATE))
 
-        # 1) Craft a short assistant reply with one follow-up
-        reply = await self.llm.chat(
-            system=SYSTEM_PROMPT,
-            messages=history + [{"role":"user","content":message}]
-        )
+        with llm_session(session_id):
+            # 1) Craft a short assistant reply with one follow-up
+            reply = await self.llm.chat(
+                system=SYSTEM_PROMPT,
+                messages=history + [{"role":"user","content":message}]
+            )
 
-        # 2) Extract structured updates
-        extraction = await self.llm.extract_json(
-            prompt=EXTRACTION_PROMPT.format(schema=REQUIREMENTS_TEMPLATE),
-            conversation=history[-6:] + [{"role":"user","content":message},{"role":"assistant","content":reply}]
-        )
+            # 2) Extract structured updates
+            extraction = await self.llm.extract_json(
+                prompt=EXTRACTION_PROMPT.format(schema=REQUIREMENTS_TEMPLATE),
+                conversation=history[-6:] + [{"role":"user","content":message},{"role":"assistant","content":reply}]
+            )
 
         # 3) Merge into req_state
         self._deep_merge(req_state, extraction or {})
@@ -58,10 +61,6 @@ class IntentManager:
 
     def _deep_merge(self, base, updates):
         if isinstance(base, dict) and isinstance(updates, dict):
-            for k, v in updates.items():
-                if k in base:
-                    base[k] = self._deep_merge(base[k], v)
-                else:
-                    base[k] = v
-            return base
+            # Merge in place: the session state keeps referencing this dict.
+            return RequirementsDocument(base, list_strategy="replace", owned=True).merge(updates).data
         return updates
@@ -1,16 +1,24 @@
+import asyncio
+import logging
 import os
+from contextlib import asynccontextmanager
 from pathlib import Path
 from copy import deepcopy
 from typing import Dict, Any, Optional, Tuple
 
-from fastapi import FastAPI, UploadFile, File, Query, Body, HTTPException, WebSocket, WebSocketDisconnect
+from fastapi import FastAPI, UploadFile, File, Query, Body, HTTPException, Request, Response, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import HTMLResponse, FileResponse
+from fastapi.responses import HTMLResponse
+from pydantic import ValidationError
 from app.services.state import SessionStore
 from app.agents.intent_manager import IntentManager
 from app.agents.dev_swarm import SwarmProjectBuilder
 from app.services.build_manager import BuildManager
-from app.services.tts_eleven import speak_text
+from app.services.downloads import SendfileFileResponse, etag_matches, http_date
+from app.services.plan_jobs import PlanJobManager, PlanQueueFull
+from app.services.io_pool import run_io, shutdown_io_executor
+from app.services.llm_scheduler import get_llm_scheduler, llm_session
+from app.services.tts_eleven import TTSError, close_tts, get_tts, speak_text
 # from app.services.stt_whisper import transcribe_audio
 from app.services.stt_eleven import transcribe_audio
 from app.schemas import (
@@ -21,14 +29,36 @@ from app.schemas import (
     FinalizeDocResponse,
     SwarmPlanRequest,
     SwarmPlanResponse,
+    PlanJobSubmitResponse,
+    PlanJobStatusResponse,
     BuildStartRequest,
     BuildStartResponse,
     BuildStatusResponse,
+    BuildCancelResponse,
     REQUIREMENTS_TEMPLATE,
 )
 from app.templates.requirements_doc import render_requirements_markdown
 
-app = FastAPI(title="Intent Manager (Voice + Chat)")
+logger = logging.getLogger(__name__)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await plan_jobs.start()
+    await build_manager.start()
+    # The greeting is identical for every session; synthesize it once so /session/start hits the cache.
+    prewarm = asyncio.create_task(_speak(INITIAL_GREETING))
+    try:
+        yield
+    finally:
+        prewarm.cancel()
+        await build_manager.stop()
+        await plan_jobs.stop()
+        await close_tts()
+        shutdown_io_executor()
+
+
+app = FastAPI(title="Intent Manager (Voice + Chat)", lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -41,6 +71,7 @@ app.add_middleware(
 store = SessionStore()
 agent = IntentManager(session_store=store)
 swarm_builder = SwarmProjectBuilder()
+plan_jobs = PlanJobManager(swarm_builder=swarm_builder, session_store=store)
 build_artifacts_dir = os.getenv("BUILD_ARTIFACTS_DIR")
 build_manager = BuildManager(
     session_store=store,
@@ -53,12 +84,20 @@ FRONTEND_INDEX = Path(__file__).resolve().parent / "frontend" / "index.html"
 INITIAL_GREETING = "Hello! I am your product creation assistant. How may I help you?"
 DEFAULT_VOICE_ID = "vBKc2FfBKJfcZNyEt1n6"
 
+async def _speak(text: str) -> Optional[str]:
+    # Voice is a nicety on top of the text reply; a TTS outage should not fail the turn.
+    try:
+        return await speak_text(text, voice_id=DEFAULT_VOICE_ID)
+    except TTSError as exc:
+        logger.warning("TTS unavailable: %s", exc)
+        return None
+
 @app.get("/", response_class=HTMLResponse)
-def serve_frontend():
-    return FRONTEND_INDEX.read_text(encoding="utf-8")
+async def serve_frontend():
+    return await run_io(FRONTEND_INDEX.read_text, encoding="utf-8")
 
 @app.post("/session/start")
-def start_session(payload: dict = Body(...)):
+async def start_session(payload: dict = Body(...)):
     session_id = payload.get("session_id", "default")
     seed = payload.get("seed") or {}
     history = seed.setdefault("history", [])
@@ -66,7 +105,7 @@ def start_session(payload: dict = Body(...)):
         history.append({"role": "assistant", "content": INITIAL_GREETING})
     seed.setdefault("requirements_state", deepcopy(REQUIREMENTS_TEMPLATE))
     store.reset(session_id, seed)
-    initial_audio = speak_text(INITIAL_GREETING, voice_id=DEFAULT_VOICE_ID)
+    initial_audio = await _speak(INITIAL_GREETING)
     return {
         "ok": True,
         "session_id": session_id,
@@ -94,7 +133,7 @@ async def chat_voice(
     transcript = await transcribe_audio(audio)
     # 2) Agent turn
     reply, new_state = await agent.handle_user_message(session_id, transcript)
-    audio_b64 = speak_text(reply, voice_id=DEFAULT_VOICE_ID)
+    audio_b64 = await _speak(reply)
     return VoiceChatResponse(
         session_id=session_id,
         transcript=transcript,
@@ -133,22 +172,79 @@ async def generate_technical_plan(req: SwarmPlanRequest):
     if not brief:
         raise HTTPException(status_code=400, detail="Project brief missing. Provide session_id or brief_override.")
 
-    result = await swarm_builder.plan_project(brief, rounds=req.rounds)
+    with llm_session(req.session_id):
+        result = await swarm_builder.plan_project(
+            brief,
+            rounds=req.rounds,
+            bypass_team_cache=req.bypass_team_cache,
+            deadline_seconds=req.deadline_seconds,
+        )
     if session_state is not None and req.session_id:
         session_state.setdefault("tech_specs", {})["latest"] = result
         store.set(req.session_id, session_state)
     return SwarmPlanResponse(**result)
 
 
+@app.post("/projects/tech-plan/jobs", response_model=PlanJobSubmitResponse, status_code=202)
+async def submit_technical_plan(req: SwarmPlanRequest):
+    brief, _ = _resolve_brief(req.session_id, req.brief_override)
+    if not brief:
+        raise HTTPException(status_code=400, detail="Project brief missing. Provide session_id or brief_override.")
+    try:
+        run_id = plan_jobs.submit(
+            brief,
+            session_id=req.session_id,
+            rounds=req.rounds,
+            bypass_team_cache=req.bypass_team_cache,
+            deadline_seconds=req.deadline_seconds,
+        )
+    except PlanQueueFull as exc:
+        raise HTTPException(status_code=429, detail=str(exc), headers={"Retry-After": "30"})
+    return PlanJobSubmitResponse(
+        run_id=run_id,
+        status="queued",
+        queue_position=plan_jobs.queue_position(run_id),
+    )
+
+
+@app.get("/projects/tech-plan/jobs/{run_id}", response_model=PlanJobStatusResponse)
+async def technical_plan_status(run_id: str):
+    record = plan_jobs.get(run_id)
+    if not record:
+        raise HTTPException(status_code=404, detail="Unknown plan run ID.")
+    payload = {key: value for key, value in record.items() if key not in ("result", "session_id")}
+    return PlanJobStatusResponse(**payload, queue_position=plan_jobs.queue_position(run_id))
+
+
+@app.get("/projects/tech-plan/jobs/{run_id}/result", response_model=SwarmPlanResponse)
+async def technical_plan_result(run_id: str):
+    record = plan_jobs.get(run_id)
+    if not record:
+        raise HTTPException(status_code=404, detail="Unknown plan run ID.")
+    if record["status"] == "failed":
+        raise HTTPException(status_code=500, detail=record.get("message") or "Planning failed.")
+    if record["status"] != "complete":
+        raise HTTPException(status_code=409, detail=f"Plan is not ready yet (status: {record['status']}).")
+    return SwarmPlanResponse(**record["result"])
+
+
 @app.websocket("/ws/projects/tech-plan")
 async def ws_technical_plan(websocket: WebSocket):
     await websocket.accept()
     try:
         init = await websocket.receive_json()
-        session_id = init.get("session_id")
-        rounds = init.get("rounds")
-        brief_override = init.get("brief_override")
-        brief, session_state = _resolve_brief(session_id, brief_override)
+        try:
+            # Same constraints as the HTTP endpoints (rounds, deadline_seconds bounds).
+            req = SwarmPlanRequest.model_validate(init)
+        except ValidationError as exc:
+            problems = "; ".join(
+                f"{'.'.join(str(part) for part in error['loc'])}: {error['msg']}" for error in exc.errors()
+            )
+            await websocket.send_json({"type": "error", "payload": f"Invalid request: {problems}"})
+            await websocket.close(code=4000)
+            return
+        session_id = req.session_id
+        brief, session_state = _resolve_brief(session_id, req.brief_override)
         if not brief:
             await websocket.send_json({"type": "error", "payload": "Project brief missing."})
             await websocket.close(code=4000)
@@ -157,7 +253,14 @@ async def ws_technical_plan(websocket: WebSocket):
         async def emit(event: Dict[str, Any]):
             await websocket.send_json(event)
 
-        result = await swarm_builder.plan_project_stream(brief, emit, rounds=rounds)
+        with llm_session(session_id):
+            result = await swarm_builder.plan_project_stream(
+                brief,
+                emit,
+                rounds=req.rounds,
+                bypass_team_cache=req.bypass_team_cache,
+                deadline_seconds=req.deadline_seconds,
+            )
         if session_state is not None and session_id:
             session_state.setdefault("tech_specs", {})["latest"] = result
             store.set(session_id, session_state)
@@ -172,6 +275,11 @@ async def ws_technical_plan(websocket: WebSocket):
         await websocket.close(code=4001)
 
 
+@app.get("/llm/scheduler")
+def llm_scheduler_stats():
+    return get_llm_scheduler().stats()
+
+
 @app.post("/build/start", response_model=BuildStartResponse)
 async def start_build(req: BuildStartRequest):
     state = store.get(req.session_id)
@@ -186,9 +294,20 @@ async def start_build(req: BuildStartRequest):
     return BuildStartResponse(build_id=build_id)
 
 
+@app.post("/build/cancel/{build_id}", response_model=BuildCancelResponse)
+async def cancel_build(build_id: str):
+    status = await build_manager.get_status(build_id)
+    if not status:
+        raise HTTPException(status_code=404, detail="Unknown build ID.")
+    record = build_manager.cancel(build_id)
+    if record is None:
+        raise HTTPException(status_code=409, detail=f"Build already finished (status: {status['status']}).")
+    return BuildCancelResponse(build_id=build_id, status=record["status"], message=record["message"])
+
+
 @app.get("/build/status/{build_id}", response_model=BuildStatusResponse)
-def build_status(build_id: str):
-    status = build_manager.get_status(build_id)
+async def build_status(build_id: str):
+    status = await build_manager.get_status(build_id)
     if not status:
         raise HTTPException(status_code=404, detail="Unknown build ID.")
 
@@ -199,24 +318,78 @@ def build_status(build_id: str):
         "project_name": status.get("project_name"),
         "download_path": str(status.get("download_path")) if status.get("download_path") else None,
         "stack": status.get("stack"),
-        "validation_reports": status.get("validation_reports", []),
+        "validation_reports": await run_io(build_manager.load_validation_reports, status),
+        "files_done": status.get("files_done", 0),
+        "files_total": status.get("files_total", 0),
+        "files_reused": status.get("files_reused", 0),
+        "files_regenerated": status.get("files_regenerated", 0),
+        "archive_sha256": status.get("archive_digest"),
+        "archive_size": status.get("archive_size"),
+        "timings": status.get("timings"),
     }
     return BuildStatusResponse(**payload)
 
 
+@app.get("/build/profile")
+def build_profile(limit: int = Query(100, ge=1, le=1000)):
+    return build_manager.profile_summary(limit)
+
+
+@app.get("/tts/cache/stats")
+def tts_cache_stats():
+    return get_tts().cache.stats()
+
+
+@app.get("/build/artifacts/stats")
+def build_artifact_stats():
+    return build_manager.artifacts.stats()
+
+
+@app.websocket("/ws/build/{build_id}")
+async def ws_build_progress(websocket: WebSocket, build_id: str):
+    await websocket.accept()
+    if not await build_manager.get_status(build_id):
+        await websocket.send_json({"type": "error", "payload": "Unknown build ID."})
+        await websocket.close(code=4004)
+        return
+    try:
+        async for event in build_manager.stream_events(build_id):
+            await websocket.send_json(event)
+        await websocket.close()
+    except WebSocketDisconnect:
+        return
+
+
 @app.get("/build/download/{build_id}")
-def download_build(build_id: str):
-    status = build_manager.get_status(build_id)
+async def download_build(build_id: str, request: Request):
+    status = await build_manager.get_status(build_id)
     if not status or status.get("status") != "complete" or not status.get("download_path"):
         raise HTTPException(status_code=404, detail="Build is not ready for download.")
 
     archive_path = Path(status["download_path"])
-    if not archive_path.exists():
+    try:
+        stat_result = await run_io(archive_path.stat)
+    except FileNotFoundError:
         raise HTTPException(status_code=404, detail="Build artifact missing on server.")
 
-    filename = archive_path.name
-    return FileResponse(
+    filename = f"{build_id}.zip"
+    headers = {"Cache-Control": "private, max-age=86400"}
+    packaged_at = status.get("packaged_at") or status.get("created_at")
+    if packaged_at:
+        # The blob's mtime changes on every use, which would break If-Range with a date.
+        headers["Last-Modified"] = http_date(packaged_at)
+    digest = status.get("archive_digest")
+    if digest:
+        # The archive is content-addressed, so its sha256 doubles as a strong validator.
+        etag = f'"{digest}"'
+        headers["ETag"] = etag
+        if etag_matches(request.headers.get("if-none-match"), etag):
+            return Response(status_code=304, headers=headers)
+        await run_io(build_manager.artifacts.touch, digest)
+    return SendfileFileResponse(
         archive_path,
         media_type="application/zip",
         filename=filename,
+        headers=headers,
+        stat_result=stat_result,
     )
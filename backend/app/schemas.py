@@ -30,6 +30,13 @@ class SwarmPlanRequest(BaseModel):
     session_id: Optional[str] = None
     brief_override: Optional[Dict[str, Any]] = None
     rounds: Optional[int] = Field(default=None, ge=2, le=4, description="Number of debate rounds")
+    bypass_team_cache: bool = Field(default=False, description="Always ask the LLM to design a fresh team")
+    deadline_seconds: Optional[float] = Field(
+        default=None,
+        gt=0,
+        le=900,
+        description="Time budget for the whole run; stages trim rounds, tokens or fall back to fit it",
+    )
 
 
 class SwarmPlanResponse(BaseModel):
@@ -40,6 +47,27 @@ class SwarmPlanResponse(BaseModel):
     execution_plan: Dict[str, Any]
     execution_markdown: str
 
+
+class PlanJobSubmitResponse(BaseModel):
+    run_id: str
+    status: str
+    queue_position: Optional[int] = None
+
+
+class PlanJobStatusResponse(BaseModel):
+    run_id: str
+    status: str
+    stage: str
+    message: Optional[str] = None
+    rounds_completed: int = 0
+    rounds_total: Optional[int] = None
+    messages: int = 0
+    queue_position: Optional[int] = None
+    created_at: str
+    started_at: Optional[str] = None
+    finished_at: Optional[str] = None
+    error: Optional[str] = None
+
 class BuildStartRequest(BaseModel):
     session_id: str
     preferences: Optional[Dict[str, Any]] = None
@@ -49,6 +77,12 @@ class BuildStartResponse(BaseModel):
     build_id: str
 
 
+class BuildCancelResponse(BaseModel):
+    build_id: str
+    status: str
+    message: str
+
+
 class BuildStatusResponse(BaseModel):
     build_id: str
     status: str
@@ -57,6 +91,13 @@ class BuildStatusResponse(BaseModel):
     download_path: Optional[str] = None
     stack: Optional[Dict[str, Any]] = None
     validation_reports: List[Dict[str, Any]] = []
+    files_done: int = 0
+    files_total: int = 0
+    files_reused: int = 0
+    files_regenerated: int = 0
+    archive_sha256: Optional[str] = None
+    archive_size: Optional[int] = None
+    timings: Optional[Dict[str, Any]] = None
 
 # Evolving requirements state schema (kept flexible)
 # The agent will fill these incrementally.
@@ -0,0 +1,219 @@
+import hashlib
+import logging
+import os
+import shutil
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterable, Optional
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 1024 * 1024
+
+
+def sha256_file(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as handle:
+        for chunk in iter(lambda: handle.read(CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class ArtifactStore:
+    """Content-addressed blob store for generated files and build archives.
+
+    Blobs live at `<root>/<sha[:2]>/<sha>` and are written once per distinct
+    content. A blob's mtime is its last use; `gc` drops blobs unused for longer
+    than `max_age_seconds` and then evicts least recently used blobs until the
+    store is back under its quota.
+    """
+
+    def __init__(
+        self,
+        root: Path,
+        max_age_seconds: Optional[float] = None,
+        quota_bytes: Optional[int] = None,
+    ):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.max_age_seconds = max_age_seconds or float(os.getenv("ARTIFACT_MAX_AGE_HOURS", "72")) * 3600
+        self.quota_bytes = quota_bytes or int(os.getenv("ARTIFACT_QUOTA_BYTES", str(5 * 1024 ** 3)))
+        # Evict down to this fraction of the quota so GC does not run on every put near the limit.
+        self.low_watermark = 0.9
+        self._lock = threading.Lock()
+        self.bytes_stored = 0
+        self.blob_count = 0
+        self.bytes_written = 0
+        self.bytes_deduplicated = 0
+        self.bytes_reclaimed = 0
+        self.blobs_reclaimed = 0
+        self.gc_runs = 0
+        self.last_gc_at: Optional[str] = None
+        self._scan()
+
+    def path(self, digest: str) -> Path:
+        return self.root / digest[:2] / digest
+
+    def exists(self, digest: str) -> bool:
+        return self.path(digest).exists()
+
+    def put_bytes(self, data: bytes) -> str:
+        digest = hashlib.sha256(data).hexdigest()
+        target = self.path(digest)
+        if self._reuse(target, len(data)):
+            return digest
+        target.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = target.with_name(f"{digest}.{threading.get_ident()}.tmp")
+        tmp_path.write_bytes(data)
+        self._commit(tmp_path, target, len(data))
+        return digest
+
+    def put_file(self, source: Path) -> str:
+        """Move `source` into the store (or drop it if the content is already stored)."""
+        digest = sha256_file(source)
+        size = source.stat().st_size
+        target = self.path(digest)
+        if self._reuse(target, size):
+            source.unlink(missing_ok=True)
+            return digest
+        target.parent.mkdir(parents=True, exist_ok=True)
+        self._commit(source, target, size)
+        return digest
+
+    def read_bytes(self, digest: str) -> Optional[bytes]:
+        try:
+            data = self.path(digest).read_bytes()
+        except FileNotFoundError:
+            return None
+        self.touch(digest)
+        return data
+
+    def touch(self, digest: str):
+        try:
+            os.utime(self.path(digest))
+        except FileNotFoundError:
+            pass
+
+    def gc(self, protected: Iterable[str] = ()) -> Dict[str, Any]:
+        keep = set(protected)
+        now = time.time()
+        blobs = []
+        for path in self.root.glob("*/*"):
+            try:
+                if path.name.endswith(".tmp"):
+                    # Left behind by a crash mid-write.
+                    if now - path.stat().st_mtime > 3600:
+                        path.unlink(missing_ok=True)
+                    continue
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            blobs.append((stat.st_mtime, stat.st_size, path))
+        blobs.sort()
+        total = sum(size for _, size, _ in blobs)
+        reclaimed = 0
+        removed = 0
+        limit = self.quota_bytes * self.low_watermark if total > self.quota_bytes else float("inf")
+        for mtime, size, path in blobs:
+            expired = now - mtime > self.max_age_seconds
+            over_quota = total - reclaimed > limit
+            if path.name in keep or not (expired or over_quota):
+                continue
+            path.unlink(missing_ok=True)
+            reclaimed += size
+            removed += 1
+        with self._lock:
+            self.bytes_stored = total - reclaimed
+            self.blob_count = len(blobs) - removed
+            self.bytes_reclaimed += reclaimed
+            self.blobs_reclaimed += removed
+            self.gc_runs += 1
+            self.last_gc_at = datetime.utcnow().isoformat() + "Z"
+        if removed:
+            logger.info("Artifact GC removed %s blobs (%s bytes)", removed, reclaimed)
+        return {"blobs_removed": removed, "bytes_reclaimed": reclaimed}
+
+    def over_quota(self) -> bool:
+        return self.bytes_stored > self.quota_bytes
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "root": str(self.root),
+            "blob_count": self.blob_count,
+            "bytes_stored": self.bytes_stored,
+            "quota_bytes": self.quota_bytes,
+            "max_age_seconds": self.max_age_seconds,
+            "bytes_written": self.bytes_written,
+            "bytes_deduplicated": self.bytes_deduplicated,
+            "bytes_reclaimed": self.bytes_reclaimed,
+            "blobs_reclaimed": self.blobs_reclaimed,
+            "gc_runs": self.gc_runs,
+            "last_gc_at": self.last_gc_at,
+        }
+
+    def _reuse(self, target: Path, size: int) -> bool:
+        if not target.exists():
+            return False
+        os.utime(target)
+        with self._lock:
+            self.bytes_deduplicated += size
+        return True
+
+    def _commit(self, source: Path, target: Path, size: int):
+        os.replace(source, target)
+        with self._lock:
+            self.bytes_stored += size
+            self.blob_count += 1
+            self.bytes_written += size
+
+    def _scan(self):
+        for path in self.root.glob("*/*"):
+            if not path.name.endswith(".tmp"):
+                self.bytes_stored += path.stat().st_size
+                self.blob_count += 1
+
+
+def dir_size(root: Path) -> int:
+    total = 0
+    for dirpath, _, filenames in os.walk(root):
+        for name in filenames:
+            try:
+                total += os.lstat(os.path.join(dirpath, name)).st_size
+            except FileNotFoundError:
+                continue
+    return total
+
+
+def remove_stale_dirs(parent: Path, suffixes: Iterable[str], max_age_seconds: float, active: Iterable[str] = ()) -> int:
+    """Delete `<build_id><suffix>` directories older than `max_age_seconds` that no running build owns."""
+    busy = set(active)
+    now = time.time()
+    removed = 0
+    for suffix in suffixes:
+        for path in parent.glob(f"*{suffix}"):
+            build_id = path.name[: -len(suffix)]
+            if build_id in busy or not path.is_dir() or now - path.stat().st_mtime <= max_age_seconds:
+                continue
+            shutil.rmtree(path, ignore_errors=True)
+            removed += 1
+    return removed
+
+
+def remove_stale_files(parent: Path, suffixes: Iterable[str], max_age_seconds: float, active: Iterable[str] = ()) -> int:
+    """Delete `<build_id><suffix>` files older than `max_age_seconds` that no running build owns."""
+    busy = set(active)
+    now = time.time()
+    removed = 0
+    for suffix in suffixes:
+        for path in parent.glob(f"*{suffix}"):
+            build_id = path.name[: -len(suffix)]
+            try:
+                if build_id in busy or not path.is_file() or now - path.stat().st_mtime <= max_age_seconds:
+                    continue
+            except FileNotFoundError:
+                continue
+            path.unlink(missing_ok=True)
+            removed += 1
+    return removed
@@ -1,17 +1,30 @@
 import asyncio
+import functools
+import hashlib
 import json
 import logging
 import shutil
 import textwrap
 import traceback
-from datetime import datetime
-from pathlib import Path
-from typing import Dict, Any, Optional, List
+import zipfile
+from datetime import datetime, timedelta
+from pathlib import Path, PurePosixPath
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from typing import AsyncIterator, Callable, Dict, Any, Optional, List, Tuple
 from uuid import uuid4
 import os
-from asyncio.subprocess import PIPE
+import re
 
+from app.services.artifact_store import ArtifactStore, dir_size, remove_stale_dirs, remove_stale_files
+from app.services.build_profile import percentiles, timed
+from app.services.build_queue import BuildQueue
+from app.services.context_index import ContextIndex, ContextSection, split_markdown
+from app.services.io_pool import run_io
 from app.services.llm_adapter import LLM
+from app.services.llm_scheduler import llm_session
+from app.services.validation_cache import ValidationCache
+from app.services.validation_runner import ValidationRunner
 from app.templates.requirements_doc import render_requirements_markdown
 
 logger = logging.getLogger(__name__)
@@ -54,6 +67,33 @@ Rules:
 FILE_WRITER_SYSTEM_PROMPT = """You generate a SINGLE source file for a project.
 Return ONLY the raw file contents (no markdown fences, no commentary)."""
 
+BATCH_FILE_WRITER_SYSTEM_PROMPT = """You generate several small source files for a project in one reply.
+Return ONLY a JSON object whose keys are the requested file paths and whose values are the complete raw file contents.
+No markdown fences, no commentary, no extra keys."""
+
+FILE_REPAIR_SYSTEM_PROMPT = """You fix a SINGLE source file that failed the project's build checks.
+Return ONLY the corrected, complete file contents (no markdown fences, no commentary)."""
+
+# Configs and other short files are generated together in one LLM call.
+SMALL_FILE_SUFFIXES = {".json", ".txt", ".toml", ".ini", ".cfg", ".yaml", ".yml", ".env", ".example", ".md", ".css"}
+SMALL_FILE_NAMES = {"dockerfile", ".gitignore", ".dockerignore", ".env.example", "__init__.py", "procfile"}
+
+# Checkpointed in order; a resumed build skips every stage recorded as completed.
+BUILD_STAGES = ("planning", "generating", "validating", "packaging")
+TERMINAL_BUILD_STATUSES = ("complete", "failed", "cancelled")
+
+# File references in compiler/bundler output, e.g. `./main.py`, `src/App.tsx(3,5)`, `/abs/frontend/src/x.js:3:1`.
+FILE_REF_RE = re.compile(
+    r"((?:[A-Za-z]:)?[\w./\\@-]*[\w@-]\.(?:pyi?|jsx?|tsx?|mjs|cjs|vue|svelte|css|scss|html|json))\b"
+)
+REPAIR_ERROR_CHARS = 4000
+
+# Fixed entry timestamps keep archives of identical content byte-identical.
+ZIP_DATE_TIME = (1980, 1, 1, 0, 0, 0)
+
+# Age after which an orphaned top-level archive is swept by garbage collection.
+STALE_ARCHIVE_SECONDS = 3600
+
 
 class BuildManager:
     def __init__(
@@ -69,16 +109,142 @@ class BuildManager:
             provider_override=provider_override,
             api_key_override=api_key_override,
             model_override=model_override,
+            priority="build",
         )
         default_artifact_root = Path(os.getenv("BUILD_ARTIFACTS_DIR", "/tmp/intent-builds"))
         self.artifacts_dir = Path(artifacts_dir) if artifacts_dir else default_artifact_root
         self.artifacts_dir.mkdir(parents=True, exist_ok=True)
         self.builds: Dict[str, Dict[str, Any]] = {}
         self.model_override = model_override
+        self.file_concurrency = max(1, int(os.getenv("BUILD_FILE_CONCURRENCY", "4")))
+        self.file_context_tokens = max(200, int(os.getenv("BUILD_FILE_CONTEXT_TOKENS", "1500")))
+        self.batch_max_files = int(os.getenv("BUILD_BATCH_MAX_FILES", "6"))
+        self.worker_count = max(1, int(os.getenv("BUILD_WORKERS", "2")))
+        self.max_per_session = max(1, int(os.getenv("BUILD_MAX_PER_SESSION", "1")))
+        queue_db = os.getenv("BUILD_QUEUE_DB")
+        self.queue = BuildQueue(Path(queue_db) if queue_db else self.artifacts_dir / "builds.sqlite3")
+        # One thread, so queue writes land in the order they were issued.
+        self._queue_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="build-queue")
+        self._pending: List[str] = []
+        self._running_per_session: Counter = Counter()
+        self._tasks: Dict[str, asyncio.Task] = {}
+        self._workers: List[asyncio.Task] = []
+        self._wakeup: Optional[asyncio.Event] = None
+        self._subscribers: Dict[str, List[asyncio.Queue]] = {}
+        self.subscriber_buffer = max(16, int(os.getenv("BUILD_EVENT_BUFFER", "1000")))
+        self.zip_compresslevel = min(9, max(0, int(os.getenv("BUILD_ZIP_COMPRESSLEVEL", "6"))))
+        self.keep_workspace = os.getenv("BUILD_KEEP_WORKSPACE", "false").lower() == "true"
+        validation_cache_dir = os.getenv("VALIDATION_CACHE_DIR")
+        npm_cache_dir = os.getenv("NPM_CACHE_DIR")
+        self.npm_cache_max_bytes = int(os.getenv("NPM_CACHE_MAX_BYTES", str(2 * 1024 ** 3)))
+        self.repair_iterations = max(0, int(os.getenv("BUILD_REPAIR_ITERATIONS", "2")))
+        self.cancel_superseded = os.getenv("BUILD_CANCEL_SUPERSEDED", "true").lower() == "true"
+        self.validation_runner = ValidationRunner(
+            cache=ValidationCache(
+                Path(validation_cache_dir) if validation_cache_dir else self.artifacts_dir / "validation-cache"
+            ),
+            npm_cache_dir=Path(npm_cache_dir) if npm_cache_dir else self.artifacts_dir / "npm-cache",
+        )
+        artifact_store_dir = os.getenv("ARTIFACT_STORE_DIR")
+        self.artifacts = ArtifactStore(
+            Path(artifact_store_dir) if artifact_store_dir else self.artifacts_dir / "store"
+        )
+        self.gc_interval = max(10.0, float(os.getenv("ARTIFACT_GC_INTERVAL_SECONDS", "600")))
+        self._gc_task: Optional[asyncio.Task] = None
+
+    async def start(self):
+        if self._workers:
+            return
+        self._wakeup = asyncio.Event()
+        for record in self.queue.unfinished():
+            # Interrupted by a crash or restart: pick up again after the last completed stage.
+            build_id = record["build_id"]
+            record["status"] = "queued"
+            record["message"] = f"Resuming after restart ({record.get('stage_completed') or 'not started'})"
+            self.builds[build_id] = record
+            self._pending.append(build_id)
+            logger.info("Re-queued interrupted build %s", build_id)
+        self._workers = [
+            asyncio.create_task(self._worker(idx), name=f"build-worker-{idx}")
+            for idx in range(self.worker_count)
+        ]
+        self._gc_task = asyncio.create_task(self._gc_loop(), name="build-artifact-gc")
+        if self._pending:
+            self._wakeup.set()
+
+    async def stop(self):
+        # Running builds stay unfinished in the queue database and resume on the next start.
+        background = [*self._workers, *self._tasks.values(), *([self._gc_task] if self._gc_task else [])]
+        for task in background:
+            task.cancel()
+        await asyncio.gather(*background, return_exceptions=True)
+        self._workers = []
+        self._tasks = {}
+        self._gc_task = None
+        # Flush writes still queued behind the cancelled builds.
+        await self._queue_call(lambda: None)
+
+    async def collect_garbage(self) -> Dict[str, Any]:
+        """Apply artifact and build-record retention now; blobs still needed by unfinished builds are kept."""
+        active = [build_id for build_id, record in self.builds.items() if record["status"] not in TERMINAL_BUILD_STATUSES]
+        protected = [
+            record["archive_digest"]
+            for record in self.builds.values()
+            if record.get("archive_digest") and record["status"] not in TERMINAL_BUILD_STATUSES
+        ]
+        result = await run_io(self.artifacts.gc, protected)
+        result["dirs_removed"] = await run_io(
+            remove_stale_dirs,
+            self.artifacts_dir,
+            ("_workspace", "_logs"),
+            self.artifacts.max_age_seconds,
+            active,
+        )
+        # Packaged archives move into the store, so a top-level zip outside a running build was left
+        # behind by a cancel or crash mid-packaging.
+        result["files_removed"] = await run_io(
+            remove_stale_files,
+            self.artifacts_dir,
+            (".zip", ".zip.tmp"),
+            STALE_ARCHIVE_SECONDS,
+            active,
+        )
+        # Finished builds older than the artifact retention have lost their archive anyway.
+        cutoff = datetime.utcnow() - timedelta(seconds=self.artifacts.max_age_seconds)
+        result["records_removed"] = await self._queue_call(self.queue.prune, cutoff.isoformat() + "Z")
+        # get_status reloads evicted records from the queue database on demand.
+        for build_id in [
+            build_id
+            for build_id, record in self.builds.items()
+            if record["status"] in TERMINAL_BUILD_STATUSES and not self._subscribers.get(build_id)
+        ]:
+            del self.builds[build_id]
+        npm_cache_dir = self.validation_runner.npm_cache_dir
+        result["npm_cache_cleared"] = False
+        if npm_cache_dir is not None and not any(record["status"] == "validating" for record in self.builds.values()):
+            # npm never evicts on its own; start over once it outgrows its budget (no install is using it now).
+            if await run_io(dir_size, npm_cache_dir) > self.npm_cache_max_bytes:
+                await run_io(shutil.rmtree, npm_cache_dir, ignore_errors=True)
+                result["npm_cache_cleared"] = True
+        return result
+
+    async def _gc_loop(self):
+        while True:
+            try:
+                await self.collect_garbage()
+            except Exception:
+                logger.exception("Artifact garbage collection failed")
+            await asyncio.sleep(self.gc_interval)
 
     def start_build(self, session_id: str, preferences: Optional[Dict[str, Any]] = None) -> str:
+        if self._wakeup is None:
+            raise RuntimeError("Build workers are not running.")
         build_id = str(uuid4())
-        self.builds[build_id] = {
+        if self.cancel_superseded:
+            for other_id, other in list(self.builds.items()):
+                if other["session_id"] == session_id and other["status"] not in TERMINAL_BUILD_STATUSES:
+                    self.cancel(other_id, f"Superseded by build {build_id}")
+        record = {
             "build_id": build_id,
             "session_id": session_id,
             "status": "queued",
@@ -88,73 +254,652 @@ class BuildManager:
             "download_path": None,
             "error": None,
             "plan": None,
+            "spec": None,
+            "context": None,
+            "stage_completed": None,
             "validation_reports": [],
+            "files_done": 0,
+            "files_total": 0,
+            "files_reused": 0,
+            "files_regenerated": 0,
         }
-        asyncio.create_task(self._run_build(build_id))
+        self.builds[build_id] = record
+        self._persist(record)
+        self._pending.append(build_id)
+        self._wakeup.set()
         return build_id
 
-    def get_status(self, build_id: str) -> Optional[Dict[str, Any]]:
-        return self.builds.get(build_id)
+    def cancel(self, build_id: str, reason: str = "Cancelled by request") -> Optional[Dict[str, Any]]:
+        """Stop a queued or running build; returns None when it is unknown or already finished."""
+        record = self.builds.get(build_id)
+        if not record or record["status"] in TERMINAL_BUILD_STATUSES:
+            return None
+        record["cancel_reason"] = reason
+        if build_id in self._pending:
+            self._pending.remove(build_id)
+            self._mark_cancelled(record)
+            return record
+        task = self._tasks.get(build_id)
+        if task is not None:
+            # Propagates into in-flight LLM calls and validator subprocesses; _execute_build cleans up.
+            task.cancel()
+            record["message"] = "Cancelling"
+        return record
+
+    def _mark_cancelled(self, record: Dict[str, Any]):
+        record["status"] = "cancelled"
+        record["message"] = record.get("cancel_reason") or "Cancelled"
+        record["download_path"] = None
+        self._strip_record(record)
+        self._persist(record)
+        self._broadcast(record["build_id"], self._final_event(record))
+        logger.info("Build %s cancelled: %s", record["build_id"], record["message"])
+
+    async def _discard_partial_outputs(self, build_id: str):
+        def remove():
+            shutil.rmtree(self.artifacts_dir / f"{build_id}_workspace", ignore_errors=True)
+            for leftover in (f"{build_id}.zip", f"{build_id}.zip.tmp"):
+                (self.artifacts_dir / leftover).unlink(missing_ok=True)
+
+        await run_io(remove)
+
+    async def get_status(self, build_id: str) -> Optional[Dict[str, Any]]:
+        record = self.builds.get(build_id)
+        if record is None:
+            # Finished before the last restart or evicted by GC; served from the queue database.
+            record = await self._queue_call(self.queue.load, build_id)
+            if record is not None:
+                # Another request may have loaded it while this one waited on the queue thread.
+                record = self.builds.setdefault(build_id, record)
+        return record
+
+    async def stream_events(self, build_id: str) -> AsyncIterator[Dict[str, Any]]:
+        """Current state of the build followed by live progress events, ending with the final one."""
+        record = await self.get_status(build_id)
+        if record is None:
+            return
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.subscriber_buffer)
+        self._subscribers.setdefault(build_id, []).append(queue)
+        try:
+            yield self._event(build_id, "snapshot", {
+                "status": record["status"],
+                "message": record.get("message", ""),
+                "stage_completed": record.get("stage_completed"),
+                "files_done": record.get("files_done", 0),
+                "files_total": record.get("files_total", 0),
+            })
+            if record["status"] in TERMINAL_BUILD_STATUSES:
+                yield self._final_event(record)
+                return
+            while True:
+                event = await queue.get()
+                yield event
+                if event["type"] in TERMINAL_BUILD_STATUSES:
+                    return
+        finally:
+            subscribers = self._subscribers.get(build_id, [])
+            if queue in subscribers:
+                subscribers.remove(queue)
+            if not subscribers:
+                self._subscribers.pop(build_id, None)
+
+    def _event(self, build_id: str, event_type: str, payload: Dict[str, Any]) -> Dict[str, Any]:
+        return {"type": event_type, "build_id": build_id, "payload": payload}
+
+    def _final_event(self, record: Dict[str, Any]) -> Dict[str, Any]:
+        build_id = record["build_id"]
+        if record["status"] == "complete":
+            return self._event(build_id, "complete", {
+                "message": record.get("message", ""),
+                "download_url": f"/build/download/{build_id}",
+                "project_name": record.get("project_name"),
+                "stack": record.get("stack"),
+                "validation": [
+                    {"command": report.get("command"), "returncode": report.get("returncode")}
+                    for report in record.get("validation_reports") or []
+                ],
+            })
+        return self._event(build_id, record["status"], {"message": record.get("message", "")})
+
+    def _publish(self, build_id: str, event_type: str, payload: Dict[str, Any]):
+        self._broadcast(build_id, self._event(build_id, event_type, payload))
+
+    def _broadcast(self, build_id: str, event: Dict[str, Any]):
+        for queue in self._subscribers.get(build_id, []):
+            if queue.full():
+                # Slow consumer: drop its oldest event rather than stall the build.
+                queue.get_nowait()
+            queue.put_nowait(event)
+
+    def _persist(self, record: Dict[str, Any]):
+        """Queue a write of `record`; encoding and the SQLite commit happen on the queue thread."""
+        self._queue_executor.submit(self._save_record, self._snapshot(record))
+
+    def _save_record(self, record: Dict[str, Any]):
+        try:
+            self.queue.save(record)
+        except Exception:
+            logger.exception("Failed to persist build %s", record.get("build_id"))
+
+    async def _queue_call(self, fn: Callable[..., Any], *args: Any) -> Any:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._queue_executor, functools.partial(fn, *args))
+
+    @staticmethod
+    def _snapshot(value: Any) -> Any:
+        # Copies dicts and lists but shares strings and numbers, so file contents are not duplicated.
+        # The build keeps mutating its record while the queue thread encodes this copy.
+        if isinstance(value, dict):
+            return {key: BuildManager._snapshot(item) for key, item in value.items()}
+        if isinstance(value, list):
+            return [BuildManager._snapshot(item) for item in value]
+        return value
+
+    def _claim_next(self) -> Optional[str]:
+        for idx, build_id in enumerate(self._pending):
+            session_id = self.builds[build_id]["session_id"]
+            if self._running_per_session[session_id] < self.max_per_session:
+                del self._pending[idx]
+                self._running_per_session[session_id] += 1
+                return build_id
+        return None
+
+    async def _worker(self, idx: int):
+        while True:
+            build_id = self._claim_next()
+            if build_id is None:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+            session_id = self.builds[build_id]["session_id"]
+            task = asyncio.create_task(self._run_build(build_id), name=f"build-{build_id}")
+            self._tasks[build_id] = task
+            try:
+                await task
+            except asyncio.CancelledError:
+                if asyncio.current_task().cancelling():
+                    raise
+                # Only the build was cancelled, possibly before it got to run at all.
+                record = self.builds[build_id]
+                if record["status"] not in TERMINAL_BUILD_STATUSES:
+                    self._mark_cancelled(record)
+            finally:
+                self._tasks.pop(build_id, None)
+                self._running_per_session[session_id] -= 1
+                if self._running_per_session[session_id] <= 0:
+                    del self._running_per_session[session_id]
+                # A per-session slot just freed up; let idle workers look again.
+                self._wakeup.set()
 
     async def _run_build(self, build_id: str):
         record = self.builds.get(build_id)
         if not record:
             return
-        try:
-            record["status"] = "planning"
-            record["message"] = "Collecting requirements"
-            validation_reports: List[Dict[str, Any]] = []
+        with llm_session(record["session_id"]):
+            await self._execute_build(build_id, record)
 
-            session_id = record["session_id"]
-            state = self.session_store.get(session_id)
-            swarm_context = self._gather_swarm_artifacts(state)
-            requirements_md = swarm_context["requirements_md"]
-            context_doc = swarm_context["context_doc"]
+    def _stage_done(self, record: Dict[str, Any], stage: str) -> bool:
+        completed = record.get("stage_completed")
+        return completed is not None and BUILD_STAGES.index(completed) >= BUILD_STAGES.index(stage)
 
-            record["status"] = "planning"
-            record["message"] = "Drafting project plan"
-            plan = await self._plan_project(context_doc, record["preferences"])
-            record["plan"] = plan
-
-            if plan and self._plan_has_minimum(plan):
-                record["status"] = "generating"
-                record["message"] = "Generating source files"
-                spec = await self._generate_from_plan(plan, context_doc)
-                if not spec.get("files"):
-                    spec = self._fallback_spec(context_doc)
-            else:
-                spec = self._fallback_spec(context_doc)
-
-            workspace = self.artifacts_dir / f"{build_id}_workspace"
-            if workspace.exists():
-                shutil.rmtree(workspace)
-            workspace.mkdir(parents=True, exist_ok=True)
-
-            self._write_files(workspace, spec.get("files", []))
-            self._ensure_readme(workspace, spec, context_doc)
-
-            record["status"] = "validating"
-            record["message"] = "Running quick validations"
-            validation_reports = await self._run_validations(workspace)
-
-            record["status"] = "packaging"
-            record["message"] = "Bundling project"
-            zip_base = self.artifacts_dir / build_id
-            zip_path = shutil.make_archive(str(zip_base), "zip", root_dir=workspace)
-
-            record["status"] = "complete"
-            record["message"] = "Build ready for download"
-            record["download_path"] = zip_path
-            record["stack"] = spec.get("stack", {})
-            record["project_name"] = spec.get("project_name")
-            record["error"] = None
-            record["validation_reports"] = validation_reports
+    def _enter_stage(self, record: Dict[str, Any], stage: str, message: str):
+        record["status"] = stage
+        record["message"] = message
+        self._persist(record)
+        self._publish(record["build_id"], "stage", {"status": stage, "message": message})
+
+    def _complete_stage(self, record: Dict[str, Any], stage: str):
+        record["stage_completed"] = stage
+        self._persist(record)
+
+    async def _execute_build(self, build_id: str, record: Dict[str, Any]):
+        timings = self._timings(record)
+        timings["build"] = {}
+        try:
+            async with timed(timings["build"]):
+                await self._run_stages(build_id, record)
+        except asyncio.CancelledError:
+            if not record.get("cancel_reason"):
+                # Shutdown: leave the build unfinished so it resumes on the next start.
+                raise
+            await self._discard_partial_outputs(build_id)
+            self._mark_cancelled(record)
+            return
         except Exception as exc:
             record["status"] = "failed"
             record["message"] = f"Build failed: {exc}"
             record["download_path"] = None
             record["error"] = traceback.format_exc()
             logger.exception("Build %s failed", build_id)
+        await self._compact_record(record)
+        self._persist(record)
+        self._broadcast(build_id, self._final_event(record))
+
+    async def _compact_record(self, record: Dict[str, Any]):
+        """Shrink a finished build's record to what status and downloads need.
+
+        The generated files live on in the archive and the session manifest, so the
+        spec, plan and context snapshot are dropped. Validation output moves to an
+        artifact blob (see `load_validation_reports`).
+        """
+        reports = record.get("validation_reports") or []
+        if any(report.get("stdout") or report.get("stderr") for report in reports):
+            outputs = [{"stdout": report.get("stdout", ""), "stderr": report.get("stderr", "")} for report in reports]
+            try:
+                record["validation_output_digest"] = await run_io(
+                    lambda: self.artifacts.put_bytes(json.dumps(outputs).encode("utf-8"))
+                )
+            except OSError:
+                logger.exception("Could not store validation output of build %s", record["build_id"])
+        self._strip_record(record)
+
+    def _strip_record(self, record: Dict[str, Any]):
+        record["spec"] = None
+        record["plan"] = None
+        record["context"] = None
+        record["validation_reports"] = [
+            {key: value for key, value in report.items() if key not in ("stdout", "stderr")}
+            for report in record.get("validation_reports") or []
+        ]
+
+    def load_validation_reports(self, record: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Validation reports with their output restored from the artifact store. Blocking."""
+        reports = record.get("validation_reports") or []
+        digest = record.get("validation_output_digest")
+        data = self.artifacts.read_bytes(digest) if digest else None
+        if data is None:
+            return reports
+        outputs = json.loads(data)
+        return [{**report, **output} for report, output in zip(reports, outputs)]
+
+    def _timings(self, record: Dict[str, Any]) -> Dict[str, Any]:
+        timings = record.setdefault("timings", {})
+        timings.setdefault("stages", {})
+        timings.setdefault("files", [])
+        timings.setdefault("commands", [])
+        return timings
+
+    def _stage_timer(self, record: Dict[str, Any], stage: str):
+        entry: Dict[str, Any] = {}
+        self._timings(record)["stages"][stage] = entry
+        return timed(entry)
+
+    def _log_commands(self, record: Dict[str, Any], reports: List[Dict[str, Any]]):
+        self._timings(record)["commands"].extend(
+            {
+                "command": report.get("command"),
+                "target": report.get("target"),
+                "cached": bool(report.get("cached")),
+                "returncode": report.get("returncode"),
+                "started_at": report.get("started_at"),
+                "ended_at": report.get("ended_at"),
+                "wall_seconds": 0.0 if report.get("cached") else report.get("duration_seconds", 0.0),
+            }
+            for report in reports
+        )
+
+    def profile_summary(self, limit: int = 100) -> Dict[str, Any]:
+        """Percentiles of stage, per-file and per-command timings across recent completed builds."""
+        samples = self.queue.recent_timings(limit)
+        stages: Dict[str, Dict[str, List[float]]] = {}
+        commands: Dict[str, List[float]] = {}
+        files: Dict[str, List[float]] = {"single": [], "batched": []}
+        builds: Dict[str, List[float]] = {}
+        for timings in samples:
+            for key, value in (timings.get("build") or {}).items():
+                if key.endswith("_seconds"):
+                    builds.setdefault(key, []).append(value)
+            for stage, entry in (timings.get("stages") or {}).items():
+                for key, value in entry.items():
+                    if key.endswith("_seconds"):
+                        stages.setdefault(stage, {}).setdefault(key, []).append(value)
+            for entry in timings.get("files") or []:
+                files["batched" if entry.get("batched") else "single"].append(entry.get("wall_seconds", 0.0))
+            for entry in timings.get("commands") or []:
+                if not entry.get("cached"):
+                    commands.setdefault(entry.get("command") or "?", []).append(entry.get("wall_seconds", 0.0))
+        return {
+            "builds": len(samples),
+            "build": {key: percentiles(values) for key, values in builds.items()},
+            "stages": {
+                stage: {key: percentiles(values) for key, values in metrics.items()}
+                for stage, metrics in stages.items()
+            },
+            "file_calls": {kind: percentiles(values) for kind, values in files.items()},
+            "commands": {command: percentiles(values) for command, values in commands.items()},
+        }
+
+    async def _run_stages(self, build_id: str, record: Dict[str, Any]):
+        if record.get("context") is None:
+            record["status"] = "planning"
+            record["message"] = "Collecting requirements"
+            # Snapshot the swarm output so a resumed build does not depend on in-memory session state.
+            state = self.session_store.get(record["session_id"])
+            record["context"] = self._context_snapshot(state)
+        swarm_context = self._expand_context(record["context"])
+        context_doc = swarm_context["context_doc"]
+
+        session_id = record["session_id"]
+        if not self._stage_done(record, "planning"):
+            async with self._stage_timer(record, "planning"):
+                manifest = await self._queue_call(self.queue.load_manifest, session_id) or {}
+                planner_hash = self._planner_hash(context_doc, record["preferences"])
+                if manifest.get("plan") and manifest.get("planner_hash") == planner_hash:
+                    # Same requirements and preferences as the last build: its plan still stands.
+                    self._enter_stage(record, "planning", "Reusing previous project plan")
+                    record["plan"] = manifest["plan"]
+                else:
+                    self._enter_stage(record, "planning", "Drafting project plan")
+                    record["plan"] = await self._plan_project(context_doc, record["preferences"])
+                record["planner_hash"] = planner_hash
+            self._complete_stage(record, "planning")
+
+        if not self._stage_done(record, "generating"):
+            async with self._stage_timer(record, "generating"):
+                plan = record["plan"]
+                spec = None
+                if plan and self._plan_has_minimum(plan):
+                    self._enter_stage(record, "generating", "Generating source files")
+                    manifest = await self._queue_call(self.queue.load_manifest, session_id) or {}
+                    spec = await self._generate_from_plan(
+                        plan,
+                        context_doc,
+                        record,
+                        context_sections=swarm_context["context_sections"],
+                        previous_files=await run_io(self._manifest_files, manifest),
+                    )
+                    if spec.get("files"):
+                        await self._save_manifest(record, spec)
+                if not spec or not spec.get("files"):
+                    spec = self._fallback_spec(context_doc)
+                record["spec"] = spec
+            self._complete_stage(record, "generating")
+        spec = record["spec"]
+
+        workspace = self.artifacts_dir / f"{build_id}_workspace"
+        if not self._stage_done(record, "validating"):
+            async with self._stage_timer(record, "validating"):
+                self._enter_stage(record, "validating", "Running quick validations")
+                self._timings(record)["commands"] = []
+                if self._needs_workspace(spec):
+                    await run_io(self._prepare_workspace, workspace, spec, context_doc)
+
+                    def on_output(command: str, stream: str, line: str):
+                        self._publish(build_id, "validation_output", {"command": command, "stream": stream, "line": line})
+
+                    log_dir = self.artifacts_dir / f"{build_id}_logs"
+                    reports = await self._run_validations(workspace, on_output=on_output, log_dir=log_dir)
+                    self._log_commands(record, reports)
+                    record["validation_reports"] = await self._repair_failures(
+                        record, spec, workspace, reports, swarm_context, on_output, log_dir
+                    )
+                else:
+                    record["validation_reports"] = []
+            self._complete_stage(record, "validating")
+        if workspace.exists() and not self.keep_workspace:
+            # Packaging reads from the spec, so the workspace is only needed for validation.
+            await run_io(shutil.rmtree, workspace, ignore_errors=True)
+
+        if not self._stage_done(record, "packaging"):
+            async with self._stage_timer(record, "packaging"):
+                self._enter_stage(record, "packaging", "Bundling project")
+                zip_path = self.artifacts_dir / f"{build_id}.zip"
+                await run_io(
+                    self._package, zip_path, spec, context_doc, cancelled=lambda: bool(record.get("cancel_reason"))
+                )
+                # Identical archives (e.g. every fallback build) share one blob.
+                digest = await run_io(self.artifacts.put_file, zip_path)
+                record["archive_digest"] = digest
+                record["archive_size"] = self.artifacts.path(digest).stat().st_size
+                record["download_path"] = str(self.artifacts.path(digest))
+                # Last-Modified for downloads; the blob's mtime moves whenever the store records a use.
+                record["packaged_at"] = datetime.utcnow().isoformat() + "Z"
+            self._complete_stage(record, "packaging")
+            if self.artifacts.over_quota():
+                await self.collect_garbage()
+
+        record["status"] = "complete"
+        record["message"] = "Build ready for download"
+        record["stack"] = spec.get("stack", {})
+        record["project_name"] = spec.get("project_name")
+        record["error"] = None
+
+    async def _save_manifest(self, record: Dict[str, Any], spec: Dict[str, Any]):
+        files = spec.get("files") or []
+        if not record.get("plan") or not all("prompt_hash" in file for file in files):
+            return
+
+        def store_contents() -> Dict[str, Dict[str, str]]:
+            return {
+                file["path"]: {
+                    "prompt_hash": file["prompt_hash"],
+                    "digest": self.artifacts.put_bytes(file["content"].encode("utf-8")),
+                }
+                for file in files
+            }
+
+        await self._queue_call(self.queue.save_manifest, record["session_id"], {
+            "build_id": record["build_id"],
+            "planner_hash": record.get("planner_hash"),
+            "plan": record["plan"],
+            "files": await run_io(store_contents),
+        })
+
+    def _manifest_files(self, manifest: Dict[str, Any]) -> Dict[str, Dict[str, str]]:
+        """Manifest entries with contents loaded from the artifact store; collected blobs are left out."""
+        files = {}
+        for path, entry in (manifest.get("files") or {}).items():
+            data = self.artifacts.read_bytes(entry["digest"]) if entry.get("digest") else None
+            if data is not None:
+                files[path] = {"prompt_hash": entry["prompt_hash"], "content": data.decode("utf-8")}
+        return files
+
+    async def _repair_failures(
+        self,
+        record: Dict[str, Any],
+        spec: Dict[str, Any],
+        workspace: Path,
+        reports: List[Dict[str, Any]],
+        swarm_context: Dict[str, Any],
+        on_output: Callable[[str, str, str], None],
+        log_dir: Path,
+    ) -> List[Dict[str, Any]]:
+        """Regenerate the files validators complain about, then re-check only their subtrees."""
+        plan = record.get("plan") or {}
+        stack = spec.get("stack") or {}
+        instructions = spec.get("instructions") or {}
+        metas = {meta["path"]: meta for meta in plan.get("files") or [] if meta.get("path")}
+        index = ContextIndex(swarm_context["context_sections"])
+        semaphore = asyncio.Semaphore(self.file_concurrency)
+        record["repairs"] = []
+        for attempt in range(1, self.repair_iterations + 1):
+            failing = self._failing_files(reports, workspace, spec)
+            if not failing:
+                break
+            self._enter_stage(
+                record,
+                "validating",
+                f"Repairing {len(failing)} file(s), attempt {attempt}/{self.repair_iterations}",
+            )
+            files = {file["path"]: file for file in spec["files"]}
+
+            async def repair(path: str, errors: str) -> Tuple[str, Optional[str]]:
+                meta = metas.get(path) or {"path": path}
+                async with semaphore:
+                    try:
+                        content = await self._repair_single_file(
+                            meta,
+                            stack=stack,
+                            context_doc=self._file_context(index, [meta], stack, swarm_context["context_doc"]),
+                            instructions=instructions,
+                            current=files[path].get("content", ""),
+                            errors=errors,
+                        )
+                    except Exception as exc:
+                        logger.warning("Failed to repair %s: %s", path, exc)
+                        content = None
+                return path, content
+
+            results = await asyncio.gather(*(repair(path, errors) for path, errors in failing.items()))
+            repaired = [path for path, content in results if content and content != files[path].get("content")]
+            if not repaired:
+                break
+            for path, content in results:
+                if path in repaired:
+                    files[path]["content"] = content
+            await run_io(self._write_files, workspace, [files[path] for path in repaired])
+            targets = {path.split("/", 1)[0] for path in repaired}
+            rerun = await self._run_validations(workspace, on_output=on_output, log_dir=log_dir, targets=targets)
+            self._log_commands(record, rerun)
+            reports = sorted(
+                [report for report in reports if report.get("target") not in targets] + rerun,
+                key=lambda report: report.get("target") or "",
+            )
+            record["repairs"].append({
+                "attempt": attempt,
+                "files": repaired,
+                "passed": all(report["returncode"] == 0 for report in rerun),
+            })
+            logger.info("Build %s repair attempt %s rewrote %s", record["build_id"], attempt, repaired)
+        if record["repairs"]:
+            await self._save_manifest(record, spec)
+        return reports
+
+    def _failing_files(
+        self,
+        reports: List[Dict[str, Any]],
+        workspace: Path,
+        spec: Dict[str, Any],
+    ) -> Dict[str, str]:
+        """Generated files named in failing validator output, mapped to that output."""
+        known = {file["path"] for file in spec.get("files") or [] if file.get("path")}
+        root = workspace.resolve()
+        failing: Dict[str, str] = {}
+        for report in reports:
+            if report.get("returncode") == 0 or report.get("timed_out") or report.get("cached"):
+                continue
+            output = "\n".join(part for part in (report.get("stdout"), report.get("stderr")) if part)
+            cwd = Path(report.get("cwd") or root)
+            for match in FILE_REF_RE.finditer(output):
+                path = self._resolve_reported_path(match.group(1), cwd, root)
+                if path in known:
+                    failing.setdefault(path, output[-REPAIR_ERROR_CHARS:])
+        return failing
+
+    def _resolve_reported_path(self, raw: str, cwd: Path, root: Path) -> Optional[str]:
+        candidate = Path(raw.replace("\\", "/"))
+        if not candidate.is_absolute():
+            candidate = cwd / candidate
+        try:
+            return candidate.resolve().relative_to(root).as_posix()
+        except (ValueError, OSError):
+            return None
+
+    async def _repair_single_file(
+        self,
+        meta: Dict[str, Any],
+        stack: Dict[str, Any],
+        context_doc: str,
+        instructions: Dict[str, Any],
+        current: str,
+        errors: str,
+    ) -> Optional[str]:
+        path = meta["path"]
+        user = textwrap.dedent(f"""
+        Project stack:
+        Frontend: {stack.get('frontend', 'unspecified')}
+        Backend: {stack.get('backend', 'unspecified')}
+
+        Additional instructions:
+        Setup: {instructions.get('setup', [])}
+        Run: {instructions.get('run', [])}
+
+        File to fix: {path}
+        Purpose: {meta.get('purpose') or 'Implement the required functionality.'}
+
+        Relevant technical context (excerpts from requirements, execution plan and debate):
+        {context_doc}
+
+        Validator output:
+        {errors}
+
+        Current contents of {path}:
+        {current}
+
+        Output only the corrected complete file contents for {path}.
+        """).strip()
+        return await self.llm.chat(
+            system=FILE_REPAIR_SYSTEM_PROMPT,
+            messages=[{"role": "user", "content": user}],
+            model=self.model_override,
+            temperature=0.2,
+        )
+
+    def _needs_workspace(self, spec: Dict[str, Any]) -> bool:
+        # Mirrors ValidationRunner.validators: only these trees have anything to run.
+        paths = [file.get("path") or "" for file in spec.get("files", [])]
+        return any(path.startswith("backend/") or path == "frontend/package.json" for path in paths)
+
+    def _package(
+        self,
+        zip_path: Path,
+        spec: Dict[str, Any],
+        context_doc: str,
+        cancelled: Callable[[], bool] = lambda: False,
+    ):
+        """Write the archive straight from the generated contents, without touching the workspace.
+
+        Runs in a pool thread that task cancellation cannot stop, so it polls `cancelled`
+        and never publishes the archive for a cancelled build.
+        """
+        tmp_path = zip_path.with_suffix(".zip.tmp")
+        written = set()
+        with zipfile.ZipFile(
+            tmp_path, "w", compression=zipfile.ZIP_DEFLATED, compresslevel=self.zip_compresslevel
+        ) as archive:
+            for file in spec.get("files", []):
+                if cancelled():
+                    break
+                arcname = self._archive_name(file.get("path"))
+                if not arcname or arcname in written:
+                    continue
+                # An explicit ZipInfo makes writestr ignore the archive's compresslevel.
+                archive.writestr(
+                    self._zip_info(arcname), file.get("content", ""), compresslevel=self.zip_compresslevel
+                )
+                written.add(arcname)
+            if "README.md" not in written:
+                archive.writestr(
+                    self._zip_info("README.md"),
+                    self._render_readme(spec, context_doc),
+                    compresslevel=self.zip_compresslevel,
+                )
+        if cancelled():
+            tmp_path.unlink(missing_ok=True)
+            return
+        os.replace(tmp_path, zip_path)
+
+    def _zip_info(self, arcname: str) -> zipfile.ZipInfo:
+        info = zipfile.ZipInfo(arcname, date_time=ZIP_DATE_TIME)
+        info.compress_type = zipfile.ZIP_DEFLATED
+        info.external_attr = 0o644 << 16
+        return info
+
+    def _archive_name(self, path: Optional[str]) -> Optional[str]:
+        if not path:
+            return None
+        parts = [part for part in PurePosixPath(path.replace("\\", "/")).parts if part not in ("", ".")]
+        # Same rule as _write_files: nothing may escape the project root.
+        if not parts or parts[0] == "/" or ".." in parts:
+            return None
+        return "/".join(parts)
+
+    def _prepare_workspace(self, workspace: Path, spec: Dict[str, Any], context_doc: str):
+        if workspace.exists():
+            shutil.rmtree(workspace)
+        workspace.mkdir(parents=True, exist_ok=True)
+        self._write_files(workspace, spec.get("files", []))
+        self._ensure_readme(workspace, spec, context_doc)
 
     async def _plan_project(self, context_doc: str, preferences: Dict[str, Any]) -> Optional[Dict[str, Any]]:
         prompt = PROJECT_PLANNER_PROMPT + "\n\n" + context_doc
@@ -176,28 +921,116 @@ class BuildManager:
         has_backend = any((f.get("type") == "backend" or (f.get("path") or "").startswith("backend/")) for f in files)
         return bool(has_frontend and has_backend and files)
 
-    async def _generate_from_plan(self, plan: Dict[str, Any], context_doc: str) -> Dict[str, Any]:
+    async def _generate_from_plan(
+        self,
+        plan: Dict[str, Any],
+        context_doc: str,
+        record: Optional[Dict[str, Any]] = None,
+        context_sections: Optional[List[ContextSection]] = None,
+        previous_files: Optional[Dict[str, Dict[str, str]]] = None,
+    ) -> Dict[str, Any]:
         stack = plan.get("stack") or {}
         instructions = plan.get("instructions") or {}
-        files_meta = plan.get("files") or []
-        generated_files: List[Dict[str, str]] = []
+        files_meta = [meta for meta in plan.get("files") or [] if meta.get("path")]
+        index = ContextIndex(context_sections or [])
+        progress = record if record is not None else {}
+        progress["files_done"] = 0
+        progress["files_total"] = len(files_meta)
+        semaphore = asyncio.Semaphore(self.file_concurrency)
+        contents: Dict[str, Optional[str]] = {}
+        file_timings: List[Dict[str, Any]] = []
+        if record is not None:
+            self._timings(record)["files"] = file_timings
+        prompt_hashes = {
+            meta["path"]: self._prompt_hash(
+                meta, stack, instructions, self._file_context(index, [meta], stack, context_doc)
+            )
+            for meta in files_meta
+        }
+
+        def mark_done(path: str, generated: bool, reused: bool = False):
+            progress["files_done"] += 1
+            if record is not None:
+                record["message"] = f"Generated {progress['files_done']}/{progress['files_total']} files"
+                self._publish(record["build_id"], "file", {
+                    "path": path,
+                    "generated": generated,
+                    "reused": reused,
+                    "files_done": progress["files_done"],
+                    "files_total": progress["files_total"],
+                })
+
+        # Files whose plan entry and context slice are unchanged are carried over from the last build.
+        pending: List[Dict[str, Any]] = []
         for meta in files_meta:
-            path = meta.get("path")
-            if not path:
-                continue
-            try:
-                content = await self._generate_single_file(
-                    path=path,
-                    meta=meta,
-                    stack=stack,
-                    context_doc=context_doc,
-                    instructions=instructions,
-                )
-                if content:
-                    generated_files.append({"path": path, "content": content})
-                    logger.info("Generated %s", path)
-            except Exception as exc:
-                logger.warning("Failed to generate %s: %s", path, exc)
+            previous = (previous_files or {}).get(meta["path"])
+            if previous and previous.get("content") and previous.get("prompt_hash") == prompt_hashes[meta["path"]]:
+                contents[meta["path"]] = previous["content"]
+                mark_done(meta["path"], True, reused=True)
+            else:
+                pending.append(meta)
+        progress["files_reused"] = len(files_meta) - len(pending)
+        progress["files_regenerated"] = len(pending)
+
+        async def generate(meta: Dict[str, Any]):
+            path = meta["path"]
+            async with semaphore:
+                try:
+                    timing = {"paths": [path], "batched": False}
+                    file_timings.append(timing)
+                    async with timed(timing):
+                        content = await self._generate_single_file(
+                            path=path,
+                            meta=meta,
+                            stack=stack,
+                            context_doc=self._file_context(index, [meta], stack, context_doc),
+                            instructions=instructions,
+                        )
+                    if content:
+                        logger.info("Generated %s", path)
+                    contents[path] = content
+                except Exception as exc:
+                    logger.warning("Failed to generate %s: %s", path, exc)
+                finally:
+                    mark_done(path, bool(contents.get(path)))
+
+        async def generate_batch(batch: List[Dict[str, Any]]):
+            async with semaphore:
+                try:
+                    timing = {"paths": [meta["path"] for meta in batch], "batched": True}
+                    file_timings.append(timing)
+                    async with timed(timing):
+                        generated = await self._generate_file_batch(
+                            batch,
+                            stack=stack,
+                            context_doc=self._file_context(index, batch, stack, context_doc),
+                            instructions=instructions,
+                        )
+                except Exception as exc:
+                    logger.warning("Batch generation failed for %s: %s", [m["path"] for m in batch], exc)
+                    generated = {}
+            missing = []
+            for meta in batch:
+                if generated.get(meta["path"]):
+                    contents[meta["path"]] = generated[meta["path"]]
+                    logger.info("Generated %s (batched)", meta["path"])
+                    mark_done(meta["path"], True)
+                else:
+                    missing.append(meta)
+            # Anything the batch reply dropped or garbled goes through the per-file path.
+            await asyncio.gather(*(generate(meta) for meta in missing))
+
+        batches, singles = self._batch_small_files(pending)
+        await asyncio.gather(
+            *(generate_batch(batch) for batch in batches),
+            *(generate(meta) for meta in singles),
+        )
+        # Assemble in plan order regardless of which call finished first.
+        generated_files: List[Dict[str, str]] = [
+            {"path": meta["path"], "content": contents[meta["path"]], "prompt_hash": prompt_hashes[meta["path"]]}
+            for meta in files_meta
+            if contents.get(meta["path"])
+        ]
         spec = {
             "project_name": plan.get("project_name") or plan.get("summary") or "Generated Project",
             "stack": stack,
@@ -206,6 +1039,130 @@ class BuildManager:
         }
         return spec
 
+    def _planner_hash(self, context_doc: str, preferences: Dict[str, Any]) -> str:
+        payload = json.dumps([PROJECT_PLANNER_PROMPT, context_doc, preferences, self.model_override], sort_keys=True)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _prompt_hash(
+        self,
+        meta: Dict[str, Any],
+        stack: Dict[str, Any],
+        instructions: Dict[str, Any],
+        context: str,
+    ) -> str:
+        payload = json.dumps([meta, stack, instructions, context, self.model_override], sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _file_context(
+        self,
+        index: ContextIndex,
+        metas: List[Dict[str, Any]],
+        stack: Dict[str, Any],
+        context_doc: str,
+    ) -> str:
+        query = " ".join(
+            str(part)
+            for meta in metas
+            for part in (
+                re.sub(r"[/._-]+", " ", meta.get("path") or ""),
+                meta.get("type"),
+                meta.get("language"),
+                meta.get("purpose"),
+                stack.get(meta.get("type") or "", ""),
+            )
+            if part
+        )
+        return index.select(query, self.file_context_tokens, fallback=context_doc)
+
+    def _is_small_file(self, meta: Dict[str, Any]) -> bool:
+        name = Path(meta["path"]).name.lower()
+        if name in SMALL_FILE_NAMES or ".config." in name:
+            return True
+        suffix = Path(name).suffix
+        if suffix == ".html":
+            # Only simple pages; a vanilla-JS app's whole UI often lives in index.html.
+            return len(meta.get("purpose") or "") <= 160
+        return suffix in SMALL_FILE_SUFFIXES
+
+    def _batch_small_files(
+        self, files_meta: List[Dict[str, Any]]
+    ) -> Tuple[List[List[Dict[str, Any]]], List[Dict[str, Any]]]:
+        if self.batch_max_files < 2:
+            return [], list(files_meta)
+        groups: Dict[str, List[Dict[str, Any]]] = {}
+        singles: List[Dict[str, Any]] = []
+        for meta in files_meta:
+            if self._is_small_file(meta):
+                # Related files share a top-level directory (backend/, frontend/, ...).
+                groups.setdefault(meta["path"].split("/", 1)[0], []).append(meta)
+            else:
+                singles.append(meta)
+        batches: List[List[Dict[str, Any]]] = []
+        for group in groups.values():
+            for start in range(0, len(group), self.batch_max_files):
+                chunk = group[start:start + self.batch_max_files]
+                if len(chunk) == 1:
+                    singles.append(chunk[0])
+                else:
+                    batches.append(chunk)
+        return batches, singles
+
+    async def _generate_file_batch(
+        self,
+        batch: List[Dict[str, Any]],
+        stack: Dict[str, Any],
+        context_doc: str,
+        instructions: Dict[str, Any],
+    ) -> Dict[str, str]:
+        listing = "\n".join(
+            f"- {meta['path']} ({meta.get('type') or 'shared'}, {meta.get('language') or 'plain text'}): "
+            f"{meta.get('purpose') or 'Implement the required functionality.'}"
+            for meta in batch
+        )
+        user = textwrap.dedent(f"""
+        Project stack:
+        Frontend: {stack.get('frontend', 'unspecified')}
+        Backend: {stack.get('backend', 'unspecified')}
+
+        Additional instructions:
+        Setup: {instructions.get('setup', [])}
+        Run: {instructions.get('run', [])}
+
+        Files to generate:
+        {listing}
+
+        Relevant technical context (excerpts from requirements, execution plan and debate):
+        {context_doc}
+
+        Return a JSON object mapping each path above to its complete file contents.
+        """).strip()
+        raw = await self.llm.chat(
+            system=BATCH_FILE_WRITER_SYSTEM_PROMPT,
+            messages=[{"role": "user", "content": user}],
+            model=self.model_override,
+            temperature=0.3,
+        )
+        return self._parse_file_map(raw, {meta["path"] for meta in batch})
+
+    def _parse_file_map(self, raw: Optional[str], expected: set) -> Dict[str, str]:
+        text = (raw or "").strip()
+        fenced = re.match(r"^```(?:json)?\s*(.*?)\s*```$", text, re.DOTALL)
+        if fenced:
+            text = fenced.group(1)
+        try:
+            data = json.loads(text)
+        except ValueError:
+            return {}
+        if isinstance(data, dict) and isinstance(data.get("files"), dict):
+            data = data["files"]
+        if not isinstance(data, dict):
+            return {}
+        return {
+            path: content
+            for path, content in data.items()
+            if path in expected and isinstance(content, str) and content.strip()
+        }
+
     async def _generate_single_file(
         self,
         path: str,
@@ -232,7 +1189,7 @@ class BuildManager:
         Language/style: {language}
         Purpose: {purpose}
 
-        Technical context (requirements + execution plan + debate summary):
+        Relevant technical context (excerpts from requirements, execution plan and debate):
         {context_doc}
 
         Output only the complete file contents for {path}.
@@ -245,57 +1202,36 @@ class BuildManager:
         )
         return content
 
-    async def _run_validations(self, workspace: Path) -> List[Dict[str, Any]]:
-        reports: List[Dict[str, Any]] = []
-        backend_dir = workspace / "backend"
-        if backend_dir.exists():
-            reports.append(await self._run_command(["python", "-m", "compileall", "."], cwd=backend_dir))
-        frontend_dir = workspace / "frontend"
-        package_json = frontend_dir / "package.json"
-        if package_json.exists():
-            reports.append(await self._run_command(["npm", "install", "--ignore-scripts"], cwd=frontend_dir))
-            reports.append(await self._run_command(["npm", "run", "build"], cwd=frontend_dir))
-        return reports
-
-    async def _run_command(self, cmd: List[str], cwd: Path) -> Dict[str, Any]:
-        try:
-            proc = await asyncio.create_subprocess_exec(
-                *cmd,
-                cwd=str(cwd),
-                stdout=PIPE,
-                stderr=PIPE,
-            )
-            stdout, stderr = await proc.communicate()
-            return {
-                "command": " ".join(cmd),
-                "cwd": str(cwd),
-                "returncode": proc.returncode,
-                "stdout": stdout.decode("utf-8", errors="ignore"),
-                "stderr": stderr.decode("utf-8", errors="ignore"),
-            }
-        except FileNotFoundError as exc:
-            return {
-                "command": " ".join(cmd),
-                "cwd": str(cwd),
-                "returncode": -1,
-                "stdout": "",
-                "stderr": f"{exc}",
-            }
+    async def _run_validations(
+        self,
+        workspace: Path,
+        on_output: Optional[Callable[[str, str, str], None]] = None,
+        log_dir: Optional[Path] = None,
+        targets: Optional[set] = None,
+    ) -> List[Dict[str, Any]]:
+        return await self.validation_runner.run(workspace, log_dir=log_dir, on_output=on_output, targets=targets)
 
-    def _gather_swarm_artifacts(self, state: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    def _context_snapshot(self, state: Optional[Dict[str, Any]]) -> Dict[str, Any]:
         state = state or {}
         latest = state.get("tech_specs", {}).get("latest") or {}
-        requirements_md = latest.get("markdown") or self._legacy_requirements_markdown(state)
-        execution_markdown = latest.get("execution_markdown") or ""
-        execution_plan = latest.get("execution_plan")
-        debate_history = latest.get("debate_history") or state.get("history", [])
-        context_doc = self._compose_context(requirements_md, execution_markdown, execution_plan, debate_history)
         return {
-            "requirements_md": requirements_md,
-            "execution_markdown": execution_markdown,
-            "execution_plan": execution_plan,
-            "debate_history": debate_history,
-            "context_doc": context_doc,
+            "requirements_md": latest.get("markdown") or self._legacy_requirements_markdown(state),
+            "execution_markdown": latest.get("execution_markdown") or "",
+            "execution_plan": latest.get("execution_plan"),
+            "debate_history": latest.get("debate_history") or state.get("history", []),
+        }
+
+    def _expand_context(self, snapshot: Dict[str, Any]) -> Dict[str, Any]:
+        parts = (
+            snapshot["requirements_md"],
+            snapshot["execution_markdown"],
+            snapshot["execution_plan"],
+            snapshot["debate_history"],
+        )
+        return {
+            **snapshot,
+            "context_doc": self._compose_context(*parts),
+            "context_sections": self._context_sections(*parts),
         }
 
     def _compose_context(
@@ -326,6 +1262,34 @@ class BuildManager:
             sections.append("No technical context was captured; generating from default template.")
         return "\n\n".join(sections)
 
+    def _context_sections(
+        self,
+        requirements_md: str,
+        execution_markdown: str,
+        execution_plan: Optional[Dict[str, Any]],
+        debate_history: Optional[List[Dict[str, Any]]],
+    ) -> List[ContextSection]:
+        # Same material as _compose_context, cut into retrievable pieces for per-file prompts.
+        sections: List[ContextSection] = []
+        if requirements_md:
+            sections += split_markdown(requirements_md, "Requirements", pinned_titles=("Project Overview",))
+        if execution_markdown:
+            sections += split_markdown(execution_markdown, "Execution Plan", pinned_titles=("Tech Stack",))
+        if execution_plan:
+            for phase in execution_plan.get("phases") or []:
+                if isinstance(phase, dict):
+                    sections.append(ContextSection(
+                        title=f"Execution Plan JSON: {phase.get('name', 'Phase')}",
+                        text=json.dumps(phase, indent=2),
+                    ))
+        for msg in (debate_history or [])[-10:]:
+            if msg.get("content"):
+                sections.append(ContextSection(
+                    title=f"Debate: {(msg.get('role') or 'agent').title()}",
+                    text=msg["content"].strip(),
+                ))
+        return sections
+
     def _legacy_requirements_markdown(self, state: Dict[str, Any]) -> str:
         state = state or {}
         uploaded = state.get("uploaded_requirements")
@@ -354,6 +1318,9 @@ class BuildManager:
         readme_path = workspace / "README.md"
         if readme_path.exists():
             return
+        readme_path.write_text(self._render_readme(spec, context_doc), encoding="utf-8")
+
+    def _render_readme(self, spec: Dict[str, Any], context_doc: str) -> str:
         stack = spec.get("stack") or {}
         instructions = spec.get("instructions") or {}
         summary = spec.get("project_name") or "Generated Project"
@@ -375,7 +1342,7 @@ class BuildManager:
 ## Requirements Snapshot
 {context_doc}
 """)
-        readme_path.write_text(readme, encoding="utf-8")
+        return readme
 
     def _fallback_spec(self, context_doc: str) -> Dict[str, Any]:
         safe_requirements = context_doc.replace("```", "'''")
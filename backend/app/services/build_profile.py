@@ -0,0 +1,91 @@
+import time
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from datetime import datetime
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional
+
+
+class LLMTimer:
+    """Accumulates LLM call time; every call is also counted by the enclosing timers."""
+
+    def __init__(self, parent: Optional["LLMTimer"] = None):
+        self.parent = parent
+        self.calls = 0
+        self.seconds = 0.0
+        self.queue_seconds = 0.0
+
+    def add(self, seconds: float, queue_seconds: float):
+        timer: Optional[LLMTimer] = self
+        while timer is not None:
+            timer.calls += 1
+            timer.seconds += seconds
+            timer.queue_seconds += queue_seconds
+            timer = timer.parent
+
+
+current_llm_timer: ContextVar[Optional[LLMTimer]] = ContextVar("current_llm_timer", default=None)
+
+
+@contextmanager
+def measure_llm() -> Iterator[LLMTimer]:
+    """Collect the time spent in LLM calls made inside the block, including from tasks it spawns."""
+    timer = LLMTimer(parent=current_llm_timer.get())
+    token = current_llm_timer.set(timer)
+    try:
+        yield timer
+    finally:
+        current_llm_timer.reset(token)
+
+
+def record_llm_call(seconds: float, queue_seconds: float = 0.0):
+    timer = current_llm_timer.get()
+    if timer is not None:
+        timer.add(seconds, queue_seconds)
+
+
+def _now() -> str:
+    return datetime.utcnow().isoformat() + "Z"
+
+
+@asynccontextmanager
+async def timed(entry: Dict[str, Any]) -> AsyncIterator[LLMTimer]:
+    """Fill `entry` with wall, process CPU and LLM time for the block.
+
+    `cpu_seconds` is process-wide CPU time (threads included), so it is only an
+    upper bound when several builds run at once. `local_seconds` is wall time
+    not covered by LLM calls; with concurrent calls LLM time can exceed wall time.
+    """
+    entry["started_at"] = _now()
+    wall_start = time.perf_counter()
+    cpu_start = time.process_time()
+    with measure_llm() as timer:
+        try:
+            yield timer
+        finally:
+            wall = time.perf_counter() - wall_start
+            entry.update({
+                "ended_at": _now(),
+                "wall_seconds": round(wall, 3),
+                "cpu_seconds": round(time.process_time() - cpu_start, 3),
+                "llm_seconds": round(timer.seconds, 3),
+                "llm_queue_seconds": round(timer.queue_seconds, 3),
+                "llm_calls": timer.calls,
+                "local_seconds": round(max(0.0, wall - timer.seconds), 3),
+            })
+
+
+def percentiles(values: List[float]) -> Dict[str, float]:
+    if not values:
+        return {"count": 0, "p50": 0.0, "p90": 0.0, "p99": 0.0, "max": 0.0}
+    ordered = sorted(values)
+
+    def pick(fraction: float) -> float:
+        return round(ordered[int(fraction * (len(ordered) - 1))], 3)
+
+    return {
+        "count": len(ordered),
+        "p50": pick(0.5),
+        "p90": pick(0.9),
+        "p99": pick(0.99),
+        "max": round(ordered[-1], 3),
+    }
@@ -0,0 +1,124 @@
+import json
+import sqlite3
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+TERMINAL_STATUSES = ("complete", "failed", "cancelled")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS builds (
+    build_id TEXT PRIMARY KEY,
+    session_id TEXT NOT NULL,
+    status TEXT NOT NULL,
+    stage_completed TEXT,
+    record TEXT NOT NULL,
+    created_at TEXT NOT NULL,
+    updated_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS builds_status_idx ON builds (status, created_at);
+CREATE INDEX IF NOT EXISTS builds_session_idx ON builds (session_id, created_at);
+CREATE TABLE IF NOT EXISTS manifests (
+    session_id TEXT PRIMARY KEY,
+    manifest TEXT NOT NULL,
+    updated_at TEXT NOT NULL
+);
+"""
+
+
+class BuildQueue:
+    """SQLite-backed store for build records so queued and running builds survive a restart."""
+
+    def __init__(self, db_path: Path):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.executescript(SCHEMA)
+
+    def save(self, record: Dict[str, Any]):
+        now = datetime.utcnow().isoformat() + "Z"
+        payload = json.dumps(record, default=str)
+        with self._lock, self._conn:
+            self._conn.execute(
+                """
+                INSERT INTO builds (build_id, session_id, status, stage_completed, record, created_at, updated_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(build_id) DO UPDATE SET
+                    status = excluded.status,
+                    stage_completed = excluded.stage_completed,
+                    record = excluded.record,
+                    updated_at = excluded.updated_at
+                """,
+                (
+                    record["build_id"],
+                    record["session_id"],
+                    record["status"],
+                    record.get("stage_completed"),
+                    payload,
+                    record.get("created_at") or now,
+                    now,
+                ),
+            )
+
+    def load(self, build_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute("SELECT record FROM builds WHERE build_id = ?", (build_id,)).fetchone()
+        return json.loads(row["record"]) if row else None
+
+    def unfinished(self) -> List[Dict[str, Any]]:
+        placeholders = ",".join("?" for _ in TERMINAL_STATUSES)
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT record FROM builds WHERE status NOT IN ({placeholders}) ORDER BY created_at",
+                TERMINAL_STATUSES,
+            ).fetchall()
+        return [json.loads(row["record"]) for row in rows]
+
+    def recent_timings(self, limit: int = 100) -> List[Dict[str, Any]]:
+        with self._lock:
+            rows = self._conn.execute(
+                """
+                SELECT json_extract(record, '$.timings') AS timings FROM builds
+                WHERE status = 'complete' AND json_extract(record, '$.timings') IS NOT NULL
+                ORDER BY updated_at DESC LIMIT ?
+                """,
+                (limit,),
+            ).fetchall()
+        return [json.loads(row["timings"]) for row in rows]
+
+    def prune(self, before: str) -> int:
+        """Delete finished builds and session manifests last updated before the ISO timestamp `before`."""
+        placeholders = ",".join("?" for _ in TERMINAL_STATUSES)
+        with self._lock, self._conn:
+            removed = self._conn.execute(
+                f"DELETE FROM builds WHERE status IN ({placeholders}) AND updated_at < ?",
+                (*TERMINAL_STATUSES, before),
+            ).rowcount
+            self._conn.execute("DELETE FROM manifests WHERE updated_at < ?", (before,))
+        return removed
+
+    def load_manifest(self, session_id: str) -> Optional[Dict[str, Any]]:
+        """Plan and per-file prompt hashes/contents of the session's last generated build."""
+        with self._lock:
+            row = self._conn.execute("SELECT manifest FROM manifests WHERE session_id = ?", (session_id,)).fetchone()
+        return json.loads(row["manifest"]) if row else None
+
+    def save_manifest(self, session_id: str, manifest: Dict[str, Any]):
+        now = datetime.utcnow().isoformat() + "Z"
+        with self._lock, self._conn:
+            self._conn.execute(
+                """
+                INSERT INTO manifests (session_id, manifest, updated_at) VALUES (?, ?, ?)
+                ON CONFLICT(session_id) DO UPDATE SET manifest = excluded.manifest, updated_at = excluded.updated_at
+                """,
+                (session_id, json.dumps(manifest), now),
+            )
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
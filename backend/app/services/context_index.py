@@ -0,0 +1,116 @@
+import math
+import re
+from collections import Counter
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+TOKEN_RE = re.compile(r"[a-z0-9]+")
+STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "for", "from", "in", "into", "is", "it",
+    "of", "on", "or", "the", "this", "that", "to", "with", "will", "should", "must", "file",
+}
+
+
+def tokenize(text: str) -> List[str]:
+    return [tok for tok in TOKEN_RE.findall(text.lower()) if len(tok) > 1 and tok not in STOPWORDS]
+
+
+def estimate_tokens(text: str) -> int:
+    # ~4 characters per token is close enough for budgeting prompt context.
+    return len(text) // 4 + 1
+
+
+@dataclass
+class ContextSection:
+    title: str
+    text: str
+    pinned: bool = False
+
+    def render(self) -> str:
+        return f"## {self.title}\n{self.text.strip()}"
+
+
+class ContextIndex:
+    """In-process BM25 index over the build's context sections."""
+
+    def __init__(self, sections: List[ContextSection], k1: float = 1.5, b: float = 0.75):
+        self.sections = [section for section in sections if section.text.strip()]
+        self.k1 = k1
+        self.b = b
+        self._term_freqs: List[Counter] = []
+        self._lengths: List[int] = []
+        doc_freq: Counter = Counter()
+        for section in self.sections:
+            terms = Counter(tokenize(section.title + " " + section.text))
+            self._term_freqs.append(terms)
+            self._lengths.append(sum(terms.values()))
+            doc_freq.update(terms.keys())
+        count = len(self.sections)
+        self._avg_length = (sum(self._lengths) / count) if count else 0.0
+        self._idf: Dict[str, float] = {
+            term: math.log(1 + (count - freq + 0.5) / (freq + 0.5)) for term, freq in doc_freq.items()
+        }
+
+    def scores(self, query: str) -> List[float]:
+        terms = tokenize(query)
+        results = []
+        for freqs, length in zip(self._term_freqs, self._lengths):
+            score = 0.0
+            norm = self.k1 * (1 - self.b + self.b * length / self._avg_length) if self._avg_length else self.k1
+            for term in terms:
+                tf = freqs.get(term)
+                if tf:
+                    score += self._idf[term] * tf * (self.k1 + 1) / (tf + norm)
+            results.append(score)
+        return results
+
+    def select(self, query: str, budget_tokens: int, fallback: Optional[str] = None) -> str:
+        """Pinned sections plus the best-matching ones that fit `budget_tokens`, in document order."""
+        if not self.sections:
+            return fallback or ""
+        scores = self.scores(query)
+        chosen = set()
+        used = 0
+        for idx, section in enumerate(self.sections):
+            if section.pinned:
+                chosen.add(idx)
+                used += estimate_tokens(section.render())
+        ranked = sorted(
+            (idx for idx in range(len(self.sections)) if idx not in chosen and scores[idx] > 0),
+            key=lambda idx: scores[idx],
+            reverse=True,
+        )
+        for idx in ranked:
+            cost = estimate_tokens(self.sections[idx].render())
+            if used + cost > budget_tokens:
+                continue
+            chosen.add(idx)
+            used += cost
+        return "\n\n".join(self.sections[idx].render() for idx in sorted(chosen))
+
+
+def split_markdown(text: str, prefix: str, pinned_titles: tuple = ()) -> List[ContextSection]:
+    """Split markdown on #/##/### headings into sections titled `prefix: heading`."""
+    sections: List[ContextSection] = []
+    title = prefix
+    lines: List[str] = []
+
+    def flush():
+        body = "\n".join(line for line in lines if line.strip() != "---").strip()
+        if body:
+            sections.append(ContextSection(
+                title=title,
+                text=body,
+                pinned=any(pinned.lower() in title.lower() for pinned in pinned_titles),
+            ))
+
+    for line in text.splitlines():
+        heading = re.match(r"^#{1,3}\s+(.*)", line)
+        if heading:
+            flush()
+            title = f"{prefix}: {heading.group(1).strip()}"
+            lines = []
+        else:
+            lines.append(line)
+    flush()
+    return sections
@@ -0,0 +1,44 @@
+import time
+from typing import Any, Dict, Optional
+
+DEFAULT_CALL_TIMEOUT = 60.0
+MIN_CALL_TIMEOUT = 2.0
+
+
+class Deadline:
+    """Wall-clock time budget for one request, shared by every stage that serves it."""
+
+    def __init__(self, budget_seconds: float):
+        self.budget = float(budget_seconds)
+        self.started_at = time.monotonic()
+        self.expires_at = self.started_at + self.budget
+
+    @classmethod
+    def from_budget(cls, budget_seconds: Optional[float]) -> Optional["Deadline"]:
+        return cls(budget_seconds) if budget_seconds else None
+
+    def remaining(self) -> float:
+        return max(0.0, self.expires_at - time.monotonic())
+
+    def fraction_left(self) -> float:
+        return self.remaining() / self.budget if self.budget else 0.0
+
+    def timeout(self, default: float = DEFAULT_CALL_TIMEOUT) -> float:
+        return max(MIN_CALL_TIMEOUT, min(default, self.remaining()))
+
+    def max_tokens(self, normal: int) -> int:
+        # Shorter completions finish sooner; shrink them as the budget drains.
+        fraction = self.fraction_left()
+        if fraction >= 0.5:
+            return normal
+        if fraction >= 0.25:
+            return max(64, normal // 2)
+        return max(64, normal // 4)
+
+    def llm_kwargs(self, normal_tokens: int) -> Dict[str, Any]:
+        return {"timeout": self.timeout(), "max_tokens": self.max_tokens(normal_tokens)}
+
+
+def llm_kwargs(deadline: Optional[Deadline], normal_tokens: int) -> Dict[str, Any]:
+    """Per-call LLM overrides derived from `deadline`; empty when the request has no budget."""
+    return deadline.llm_kwargs(normal_tokens) if deadline else {}
@@ -1,12 +1,23 @@
 import os
 import json
+import asyncio
+import time
 import httpx
 from typing import List, Dict, Any, Optional
 from dotenv import load_dotenv
-from openai import AsyncOpenAI
+from openai import AsyncOpenAI, APITimeoutError
+
+from app.services.build_profile import record_llm_call
+from app.services.llm_scheduler import LLMScheduler, get_llm_scheduler
 
 load_dotenv()
 
+DEFAULT_TIMEOUT = 60.0
+
+
+class LLMTimeout(TimeoutError):
+    """An LLM call did not finish within its timeout (including time queued in the scheduler)."""
+
 
 class LLM:
     def __init__(
@@ -14,9 +25,13 @@ class LLM:
         provider_override: Optional[str] = None,
         api_key_override: Optional[str] = None,
         model_override: Optional[str] = None,
+        priority: str = "planning",
+        scheduler: Optional[LLMScheduler] = None,
     ):
         self.provider = (provider_override or os.getenv("LLM_PROVIDER", "openrouter")).lower()
         self.model_override = model_override
+        self.priority = priority
+        self.scheduler = scheduler or get_llm_scheduler()
 
         if self.provider == "openrouter":
             self.or_key = api_key_override or os.getenv("OPENROUTER_API_KEY")
@@ -35,7 +50,14 @@ class LLM:
         else:
             raise NotImplementedError("Only 'openrouter' and 'openai' providers are supported.")
 
-    async def _openrouter_chat(self, messages: List[Dict[str, str]], temperature: float, model: Optional[str]) -> str:
+    async def _openrouter_chat(
+        self,
+        messages: List[Dict[str, str]],
+        temperature: float,
+        model: Optional[str],
+        timeout: float = DEFAULT_TIMEOUT,
+        max_tokens: Optional[int] = None,
+    ) -> str:
         headers = {
             "Authorization": f"Bearer {self.or_key}",
             "Content-Type": "application/json",
@@ -50,12 +72,62 @@ class LLM:
             "messages": messages,
             "temperature": temperature,
         }
-        async with httpx.AsyncClient(timeout=60.0) as client:
+        if max_tokens:
+            payload["max_tokens"] = max_tokens
+        async with httpx.AsyncClient(timeout=timeout) as client:
             r = await client.post(f"{self.base_url}/chat/completions", headers=headers, json=payload)
             r.raise_for_status()
             data = r.json()
             return data["choices"][0]["message"]["content"]
 
+    async def _complete(
+        self,
+        msgs: List[Dict[str, str]],
+        temperature: float,
+        model: Optional[str],
+        timeout: Optional[float] = None,
+        max_tokens: Optional[int] = None,
+    ) -> str:
+        call_timeout = timeout or DEFAULT_TIMEOUT
+        timing: Dict[str, float] = {}
+
+        async def call() -> str:
+            timing["started"] = time.perf_counter()
+            try:
+                return await request()
+            finally:
+                timing["finished"] = time.perf_counter()
+
+        async def request() -> str:
+            if self.provider == "openrouter":
+                return await self._openrouter_chat(
+                    msgs, temperature=temperature, model=model, timeout=call_timeout, max_tokens=max_tokens
+                )
+            extra = {"max_tokens": max_tokens} if max_tokens else {}
+            resp = await self.client.chat.completions.create(
+                model=model or self.openai_model,
+                messages=msgs,
+                temperature=temperature,
+                timeout=call_timeout,
+                **extra,
+            )
+            return resp.choices[0].message.content
+
+        enqueued = time.perf_counter()
+        try:
+            if timeout is None:
+                return await self.scheduler.run(self.priority, call)
+            # An explicit timeout is a budget for the whole call, queueing included.
+            return await asyncio.wait_for(self.scheduler.run(self.priority, call), timeout=timeout)
+        except (asyncio.TimeoutError, httpx.TimeoutException, APITimeoutError) as exc:
+            raise LLMTimeout(f"LLM call exceeded {call_timeout:.1f}s") from exc
+        finally:
+            started = timing.get("started", time.perf_counter())
+            record_llm_call(
+                seconds=timing.get("finished", time.perf_counter()) - started,
+                queue_seconds=started - enqueued,
+            )
+
     async def chat(
         self,
         system: str,
@@ -63,17 +135,17 @@ class LLM:
         *,
         model: Optional[str] = None,
         temperature: float = 0.4,
+        timeout: Optional[float] = None,
+        max_tokens: Optional[int] = None,
     ) -> str:
         msgs = [{"role": "system", "content": system}] + messages
-        target_model = model or self.model_override
-        if self.provider == "openrouter":
-            return await self._openrouter_chat(msgs, temperature=temperature, model=target_model)
-        resp = await self.client.chat.completions.create(
-            model=target_model or self.openai_model,
-            messages=msgs,
+        return await self._complete(
+            msgs,
             temperature=temperature,
+            model=model or self.model_override,
+            timeout=timeout,
+            max_tokens=max_tokens,
         )
-        return resp.choices[0].message.content
 
     async def extract_json(
         self,
@@ -82,21 +154,20 @@ class LLM:
         *,
         model: Optional[str] = None,
         temperature: float = 0.2,
+        timeout: Optional[float] = None,
+        max_tokens: Optional[int] = None,
     ) -> Optional[Dict[str, Any]]:
         msgs = [
             {"role": "system", "content": "You output ONLY valid minified JSON. No markdown."},
             {"role": "user", "content": json.dumps({"prompt": prompt, "conversation": conversation})},
         ]
-        target_model = model or self.model_override
-        if self.provider == "openrouter":
-            raw = await self._openrouter_chat(msgs, temperature=temperature, model=target_model)
-        else:
-            resp = await self.client.chat.completions.create(
-                model=target_model or self.openai_model,
-                messages=msgs,
-                temperature=temperature,
-            )
-            raw = resp.choices[0].message.content.strip()
+        raw = await self._complete(
+            msgs,
+            temperature=temperature,
+            model=model or self.model_override,
+            timeout=timeout,
+            max_tokens=max_tokens,
+        )
         try:
             return json.loads(raw)
         except Exception:
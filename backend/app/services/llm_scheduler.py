@@ -0,0 +1,177 @@
+import asyncio
+import os
+import statistics
+import time
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Awaitable, Callable, Deque, Dict, Iterator, Optional, Tuple, TypeVar
+
+T = TypeVar("T")
+
+# Highest priority first; a waiting request is only admitted when no higher class is waiting.
+PRIORITY_CLASSES = ("interactive", "planning", "build")
+
+current_llm_session: ContextVar[Optional[str]] = ContextVar("current_llm_session", default=None)
+
+
+@contextmanager
+def llm_session(session_id: Optional[str]) -> Iterator[None]:
+    """Attribute LLM calls made inside the block (and tasks spawned from it) to `session_id`."""
+    token = current_llm_session.set(session_id)
+    try:
+        yield
+    finally:
+        current_llm_session.reset(token)
+
+
+class LLMScheduler:
+    """Global admission control for LLM calls.
+
+    Requests queue per priority class and, inside a class, per session; sessions
+    are served round-robin so one large build or plan cannot monopolise its class.
+    At most `max_in_flight` calls run at once across the whole process.
+
+    Priority alone only orders waiters, so a class could still fill every slot
+    with long calls. Some slots are therefore reserved: `interactive_reserved`
+    can only be taken by interactive calls, and `planning_reserved` more only by
+    interactive or planning calls. Builds never take the last slots, so chat
+    does not wait for a file generation to finish.
+    """
+
+    def __init__(
+        self,
+        max_in_flight: Optional[int] = None,
+        stats_window: int = 500,
+        interactive_reserved: Optional[int] = None,
+        planning_reserved: Optional[int] = None,
+    ):
+        self.max_in_flight = max(1, max_in_flight or int(os.getenv("LLM_MAX_IN_FLIGHT", "8")))
+        if interactive_reserved is None:
+            interactive_reserved = int(os.getenv("LLM_INTERACTIVE_RESERVED_SLOTS", "2"))
+        if planning_reserved is None:
+            planning_reserved = int(os.getenv("LLM_PLANNING_RESERVED_SLOTS", "1"))
+        # Every class keeps at least one slot, however small max_in_flight is.
+        self.limits = {
+            "interactive": self.max_in_flight,
+            "planning": max(1, self.max_in_flight - max(0, interactive_reserved)),
+            "build": max(1, self.max_in_flight - max(0, interactive_reserved) - max(0, planning_reserved)),
+        }
+        self._in_flight = 0
+        self._queues: Dict[str, "OrderedDict[str, Deque[asyncio.Future]]"] = {
+            priority: OrderedDict() for priority in PRIORITY_CLASSES
+        }
+        self._waiting = {priority: 0 for priority in PRIORITY_CLASSES}
+        self._running = {priority: 0 for priority in PRIORITY_CLASSES}
+        self._completed = {priority: 0 for priority in PRIORITY_CLASSES}
+        self._waits: Dict[str, Deque[float]] = {
+            priority: deque(maxlen=stats_window) for priority in PRIORITY_CLASSES
+        }
+
+    async def run(
+        self,
+        priority: str,
+        factory: Callable[[], Awaitable[T]],
+        session_id: Optional[str] = None,
+    ) -> T:
+        if priority not in self._queues:
+            raise ValueError(f"Unknown LLM priority class {priority!r}; expected one of {PRIORITY_CLASSES}.")
+        session = session_id or current_llm_session.get() or "anonymous"
+        enqueued = time.perf_counter()
+        await self._acquire(priority, session)
+        self._waits[priority].append(time.perf_counter() - enqueued)
+        try:
+            return await factory()
+        finally:
+            self._completed[priority] += 1
+            self._release(priority)
+
+    def stats(self) -> Dict[str, Any]:
+        classes = {}
+        for priority in PRIORITY_CLASSES:
+            waits = sorted(self._waits[priority])
+            classes[priority] = {
+                "waiting": self._waiting[priority],
+                "running": self._running[priority],
+                "completed": self._completed[priority],
+                "sessions_waiting": len(self._queues[priority]),
+                "wait_ms_p50": round(statistics.median(waits) * 1000, 1) if waits else 0.0,
+                "wait_ms_p95": round(waits[int(0.95 * (len(waits) - 1))] * 1000, 1) if waits else 0.0,
+                "wait_ms_max": round(waits[-1] * 1000, 1) if waits else 0.0,
+            }
+        return {
+            "max_in_flight": self.max_in_flight,
+            "in_flight": self._in_flight,
+            "limits": dict(self.limits),
+            "classes": classes,
+        }
+
+    async def _acquire(self, priority: str, session: str):
+        ahead = PRIORITY_CLASSES[: PRIORITY_CLASSES.index(priority) + 1]
+        if self._in_flight < self.limits[priority] and not any(self._waiting[cls] for cls in ahead):
+            self._grant(priority)
+            return
+        waiter = asyncio.get_running_loop().create_future()
+        self._queues[priority].setdefault(session, deque()).append(waiter)
+        self._waiting[priority] += 1
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                # The slot was granted just before cancellation; hand it to the next waiter.
+                self._release(priority)
+            else:
+                self._discard(priority, session, waiter)
+            raise
+
+    def _grant(self, priority: str):
+        self._in_flight += 1
+        self._running[priority] += 1
+
+    def _release(self, priority: str):
+        self._in_flight -= 1
+        self._running[priority] -= 1
+        while True:
+            nxt = self._next_waiter()
+            if nxt is None:
+                return
+            next_priority, waiter = nxt
+            self._grant(next_priority)
+            waiter.set_result(None)
+
+    def _next_waiter(self) -> Optional[Tuple[str, asyncio.Future]]:
+        for priority in PRIORITY_CLASSES:
+            if self._in_flight >= self.limits[priority]:
+                # Limits only shrink down the priority order, so no later class can be admitted either.
+                return None
+            sessions = self._queues[priority]
+            while sessions:
+                session, waiters = next(iter(sessions.items()))
+                waiter = waiters.popleft()
+                if waiters:
+                    sessions.move_to_end(session)
+                else:
+                    del sessions[session]
+                self._waiting[priority] -= 1
+                if not waiter.done():
+                    return priority, waiter
+        return None
+
+    def _discard(self, priority: str, session: str, waiter: asyncio.Future):
+        waiters = self._queues[priority].get(session)
+        if not waiters or waiter not in waiters:
+            return
+        waiters.remove(waiter)
+        self._waiting[priority] -= 1
+        if not waiters:
+            del self._queues[priority][session]
+
+
+_default_scheduler: Optional[LLMScheduler] = None
+
+
+def get_llm_scheduler() -> LLMScheduler:
+    global _default_scheduler
+    if _default_scheduler is None:
+        _default_scheduler = LLMScheduler()
+    return _default_scheduler
@@ -0,0 +1,171 @@
+import asyncio
+import logging
+import os
+import traceback
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+from uuid import uuid4
+
+from app.services.llm_scheduler import llm_session
+
+logger = logging.getLogger(__name__)
+
+TERMINAL_STATUSES = {"complete", "failed"}
+
+
+class PlanQueueFull(RuntimeError):
+    """Raised when the plan job queue has no room for another run."""
+
+
+def _now() -> str:
+    return datetime.utcnow().isoformat() + "Z"
+
+
+class PlanJobManager:
+    """Runs `/projects/tech-plan` requests as background jobs under a bounded worker pool."""
+
+    def __init__(
+        self,
+        swarm_builder,
+        session_store,
+        concurrency: Optional[int] = None,
+        queue_size: Optional[int] = None,
+        history_limit: Optional[int] = None,
+    ):
+        self.swarm_builder = swarm_builder
+        self.session_store = session_store
+        self.concurrency = max(1, concurrency or int(os.getenv("PLAN_JOB_CONCURRENCY", "2")))
+        self.queue_size = max(1, queue_size or int(os.getenv("PLAN_JOB_QUEUE_SIZE", "32")))
+        self.history_limit = max(1, history_limit or int(os.getenv("PLAN_JOB_HISTORY", "200")))
+        self.jobs: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._queue: Optional[asyncio.Queue] = None
+        self._workers: List[asyncio.Task] = []
+
+    async def start(self):
+        if self._workers:
+            return
+        self._queue = asyncio.Queue(maxsize=self.queue_size)
+        self._workers = [
+            asyncio.create_task(self._worker(idx), name=f"plan-job-worker-{idx}")
+            for idx in range(self.concurrency)
+        ]
+
+    async def stop(self):
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+
+    def submit(
+        self,
+        brief: Dict[str, Any],
+        session_id: Optional[str] = None,
+        **plan_kwargs: Any,
+    ) -> str:
+        if self._queue is None:
+            raise RuntimeError("Plan job workers are not running.")
+        run_id = str(uuid4())
+        record = {
+            "run_id": run_id,
+            "session_id": session_id,
+            "status": "queued",
+            "stage": "queued",
+            "message": "Waiting for a free planner",
+            "rounds_completed": 0,
+            "rounds_total": None,
+            "messages": 0,
+            "created_at": _now(),
+            "started_at": None,
+            "finished_at": None,
+            "error": None,
+            "result": None,
+        }
+        self.jobs[run_id] = record
+        try:
+            self._queue.put_nowait((run_id, brief, plan_kwargs))
+        except asyncio.QueueFull as exc:
+            self.jobs.pop(run_id, None)
+            raise PlanQueueFull(f"Plan queue is full ({self.queue_size} runs waiting).") from exc
+        self._trim_history()
+        return run_id
+
+    def get(self, run_id: str) -> Optional[Dict[str, Any]]:
+        return self.jobs.get(run_id)
+
+    def queue_position(self, run_id: str) -> Optional[int]:
+        record = self.jobs.get(run_id)
+        if not record or record["status"] != "queued":
+            return None
+        queued = [job_id for job_id, job in self.jobs.items() if job["status"] == "queued"]
+        return queued.index(run_id) + 1
+
+    async def _worker(self, idx: int):
+        while True:
+            run_id, brief, plan_kwargs = await self._queue.get()
+            try:
+                await self._run(run_id, brief, plan_kwargs)
+            finally:
+                self._queue.task_done()
+
+    async def _run(self, run_id: str, brief: Dict[str, Any], plan_kwargs: Dict[str, Any]):
+        record = self.jobs.get(run_id)
+        if not record:
+            return
+        record["status"] = "running"
+        record["stage"] = "designing_team"
+        record["message"] = "Designing planning crew"
+        record["started_at"] = _now()
+        try:
+            with llm_session(record["session_id"] or run_id):
+                result = await self.swarm_builder.plan_project_stream(
+                    brief,
+                    self._progress_handler(record),
+                    **plan_kwargs,
+                )
+            session_id = record["session_id"]
+            if session_id:
+                session_state = self.session_store.get(session_id)
+                session_state.setdefault("tech_specs", {})["latest"] = result
+                self.session_store.set(session_id, session_state)
+            record["result"] = result
+            record["status"] = "complete"
+            record["stage"] = "complete"
+            record["message"] = "Technical plan ready"
+        except Exception as exc:
+            record["status"] = "failed"
+            record["stage"] = "failed"
+            record["message"] = f"Planning failed: {exc}"
+            record["error"] = traceback.format_exc()
+            logger.exception("Plan job %s failed", run_id)
+        finally:
+            record["finished_at"] = _now()
+
+    def _progress_handler(self, record: Dict[str, Any]) -> Callable[[Dict[str, Any]], Awaitable[None]]:
+        async def on_event(event: Dict[str, Any]):
+            kind = event.get("type")
+            payload = event.get("payload") or {}
+            if kind == "team_plan":
+                record["rounds_total"] = payload.get("rounds")
+                record["stage"] = "debating"
+                record["message"] = f"Debating with {len(payload.get('agents', []))} agents"
+            elif kind == "agent_message":
+                record["messages"] += 1
+            elif kind == "round_complete":
+                record["rounds_completed"] = payload.get("round", record["rounds_completed"])
+                if record["rounds_total"] and record["rounds_completed"] >= record["rounds_total"]:
+                    record["stage"] = "aggregating"
+                    record["message"] = "Aggregating requirements and execution plan"
+                else:
+                    record["message"] = f"Completed round {record['rounds_completed']}"
+        return on_event
+
+    def _trim_history(self):
+        while len(self.jobs) > self.history_limit:
+            oldest_id = next(
+                (job_id for job_id, job in self.jobs.items() if job["status"] in TERMINAL_STATUSES),
+                None,
+            )
+            if oldest_id is None:
+                return
+            self.jobs.pop(oldest_id)
@@ -0,0 +1,154 @@
+import copy
+import hashlib
+import json
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+Path = Tuple[str, ...]
+
+_MISSING = object()
+
+
+def canonical_key(item: Any) -> str:
+    """Stable dedup key for a list item; containers are hashed from their sorted JSON form."""
+    if isinstance(item, (dict, list)):
+        encoded = json.dumps(item, sort_keys=True).encode("utf-8")
+        return hashlib.blake2b(encoded, digest_size=16).hexdigest()
+    return str(item)
+
+
+class RequirementsDocument:
+    """Requirements dict with copy-on-write rounds and a persistent per-list dedup index.
+
+    `list_strategy="union"` appends unseen list items (swarm rounds); `"replace"`
+    overwrites lists wholesale (intent manager turns). `fork()` hands out a new
+    document that shares every container with its parent until one of them writes
+    to it, so keeping earlier rounds around costs only the touched paths.
+    """
+
+    LIST_STRATEGIES = ("union", "replace")
+
+    def __init__(self, data: Optional[Dict[str, Any]] = None, list_strategy: str = "union", owned: bool = False):
+        if list_strategy not in self.LIST_STRATEGIES:
+            raise ValueError(f"Unknown list strategy {list_strategy!r}; expected one of {self.LIST_STRATEGIES}.")
+        self.list_strategy = list_strategy
+        self._data: Dict[str, Any] = data if data is not None else {}
+        self._owned: Set[int] = set()
+        self._index: Dict[Path, Set[str]] = {}
+        self._owned_index: Set[Path] = set()
+        if owned or data is None:
+            self._claim(self._data)
+
+    @property
+    def data(self) -> Dict[str, Any]:
+        return self._data
+
+    def fork(self) -> "RequirementsDocument":
+        child = RequirementsDocument.__new__(RequirementsDocument)
+        child.list_strategy = self.list_strategy
+        child._data = self._data
+        child._index = dict(self._index)
+        child._owned = set()
+        child._owned_index = set()
+        # Both sides now share every container, so neither may write in place any more.
+        self._owned = set()
+        self._owned_index = set()
+        return child
+
+    def merge(self, updates: Optional[Dict[str, Any]]) -> "RequirementsDocument":
+        if not isinstance(updates, dict) or not updates:
+            return self
+        if id(self._data) not in self._owned:
+            self._data = dict(self._data)
+            self._owned.add(id(self._data))
+        self._merge_into(self._data, (), updates)
+        return self
+
+    def _merge_into(self, node: Dict[str, Any], path: Path, updates: Dict[str, Any]):
+        for key, value in updates.items():
+            child_path = path + (key,)
+            current = node.get(key, _MISSING)
+            if isinstance(value, dict):
+                if isinstance(current, dict):
+                    child = self._writable(node, key, current)
+                else:
+                    self._drop(child_path, current)
+                    child = {}
+                    node[key] = child
+                    self._owned.add(id(child))
+                self._merge_into(child, child_path, value)
+            elif isinstance(value, list) and self.list_strategy == "union" and (current is _MISSING or isinstance(current, list)):
+                if current is _MISSING:
+                    current = []
+                    node[key] = current
+                    self._owned.add(id(current))
+                self._extend_unique(node, key, child_path, current, value)
+            else:
+                self._drop(child_path, current)
+                node[key] = self._adopt(value)
+
+    def _extend_unique(self, node: Dict[str, Any], key: str, path: Path, current: List[Any], incoming: List[Any]):
+        index = self._index_for(node, key, path, current)
+        target = node[key]
+        for item in incoming:
+            item_key = canonical_key(item)
+            if item_key in index:
+                continue
+            if path not in self._owned_index:
+                index = set(index)
+                self._index[path] = index
+                self._owned_index.add(path)
+            target = self._writable(node, key, target)
+            index.add(item_key)
+            target.append(item)
+
+    def _index_for(self, node: Dict[str, Any], key: str, path: Path, current: List[Any]) -> Set[str]:
+        index = self._index.get(path)
+        if index is not None:
+            return index
+        index = set()
+        deduped = []
+        for item in current:
+            item_key = canonical_key(item)
+            if item_key in index:
+                continue
+            index.add(item_key)
+            deduped.append(item)
+        if len(deduped) != len(current):
+            self._owned.discard(id(current))
+            node[key] = deduped
+            self._owned.add(id(deduped))
+        self._index[path] = index
+        self._owned_index.add(path)
+        return index
+
+    def _writable(self, node: Dict[str, Any], key: str, current: Any) -> Any:
+        if id(current) in self._owned:
+            return current
+        clone = dict(current) if isinstance(current, dict) else list(current)
+        node[key] = clone
+        self._owned.add(id(clone))
+        return clone
+
+    def _adopt(self, value: Any) -> Any:
+        if not isinstance(value, (dict, list)):
+            return value
+        clone = copy.deepcopy(value)
+        self._claim(clone)
+        return clone
+
+    def _drop(self, path: Path, current: Any):
+        if not isinstance(current, (dict, list)):
+            return
+        self._owned.discard(id(current))
+        stale = [p for p in self._index if p[:len(path)] == path]
+        for p in stale:
+            self._index.pop(p, None)
+            self._owned_index.discard(p)
+
+    def _claim(self, node: Any):
+        if isinstance(node, dict):
+            self._owned.add(id(node))
+            for value in node.values():
+                self._claim(value)
+        elif isinstance(node, list):
+            self._owned.add(id(node))
@@ -0,0 +1,67 @@
+import copy
+import json
+import logging
+import os
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class TeamPlanCache:
+    """LRU cache of designed team plans, optionally persisted to a JSON file."""
+
+    def __init__(self, max_entries: Optional[int] = None, path: Optional[Path] = None):
+        self.max_entries = max(1, max_entries or int(os.getenv("TEAM_PLAN_CACHE_SIZE", "128")))
+        cache_path = path or os.getenv("TEAM_PLAN_CACHE_PATH")
+        self.path = Path(cache_path) if cache_path else None
+        self._entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self._load()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        plan = self._entries.get(key)
+        if plan is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return copy.deepcopy(plan)
+
+    def put(self, key: str, plan: Dict[str, Any]):
+        self._entries[key] = copy.deepcopy(plan)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        self._save()
+
+    def clear(self):
+        self._entries.clear()
+        self._save()
+
+    def stats(self) -> Dict[str, Any]:
+        return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+    def _load(self):
+        if not self.path or not self.path.exists():
+            return
+        try:
+            entries = json.loads(self.path.read_text(encoding="utf-8"))
+        except (OSError, ValueError) as exc:
+            logger.warning("Ignoring unreadable team plan cache %s: %s", self.path, exc)
+            return
+        for key, plan in list(entries.items())[-self.max_entries:]:
+            self._entries[key] = plan
+
+    def _save(self):
+        if not self.path:
+            return
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.path.with_suffix(self.path.suffix + ".tmp")
+            tmp_path.write_text(json.dumps(self._entries), encoding="utf-8")
+            tmp_path.replace(self.path)
+        except OSError as exc:
+            logger.warning("Could not persist team plan cache to %s: %s", self.path, exc)
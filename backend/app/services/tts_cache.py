@@ -0,0 +1,108 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+def tts_cache_key(text: str, voice_id: str, model_id: str, voice_settings: Dict[str, Any]) -> str:
+    identity = {"text": text, "voice_id": voice_id, "model_id": model_id, "voice_settings": voice_settings}
+    return hashlib.sha256(json.dumps(identity, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+class TTSCache:
+    """Synthesized audio by request identity: an in-memory LRU in front of one file per entry on disk.
+
+    The memory tier is bounded by total bytes, the disk tier by entry count
+    (least recently used entries are pruned first).
+    """
+
+    def __init__(self, directory: Path, memory_bytes: Optional[int] = None, max_entries: Optional[int] = None):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.memory_bytes = memory_bytes or int(os.getenv("TTS_CACHE_MEMORY_BYTES", str(32 * 1024 * 1024)))
+        self.max_entries = max(1, max_entries or int(os.getenv("TTS_CACHE_SIZE", "2048")))
+        self._lock = threading.Lock()
+        self._memory: "OrderedDict[str, bytes]" = OrderedDict()
+        self._memory_size = 0
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    def get_memory(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            audio = self._memory.get(key)
+            if audio is not None:
+                self._memory.move_to_end(key)
+                self.memory_hits += 1
+            return audio
+
+    def get(self, key: str) -> Optional[bytes]:
+        """Memory first, then disk (promoting the entry). Touches the disk, so run it off the event loop."""
+        audio = self.get_memory(key)
+        if audio is not None:
+            return audio
+        path = self.directory / f"{key}.mp3"
+        try:
+            audio = path.read_bytes()
+            # Touch so pruning keeps recently used entries.
+            os.utime(path)
+        except FileNotFoundError:
+            with self._lock:
+                self.misses += 1
+            return None
+        except OSError as exc:
+            logger.warning("Ignoring unreadable TTS cache entry %s: %s", path, exc)
+            with self._lock:
+                self.misses += 1
+            return None
+        with self._lock:
+            self.disk_hits += 1
+        self._remember(key, audio)
+        return audio
+
+    def put(self, key: str, audio: bytes):
+        self._remember(key, audio)
+        path = self.directory / f"{key}.mp3"
+        try:
+            tmp_path = path.with_name(f"{key}.{threading.get_ident()}.tmp")
+            tmp_path.write_bytes(audio)
+            tmp_path.replace(path)
+        except OSError as exc:
+            logger.warning("Could not write TTS cache entry %s: %s", path, exc)
+            return
+        self._prune()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "memory_entries": len(self._memory),
+                "memory_bytes": self._memory_size,
+                "disk_entries": len(list(self.directory.glob("*.mp3"))),
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+            }
+
+    def _remember(self, key: str, audio: bytes):
+        if len(audio) > self.memory_bytes:
+            return
+        with self._lock:
+            previous = self._memory.pop(key, None)
+            if previous is not None:
+                self._memory_size -= len(previous)
+            self._memory[key] = audio
+            self._memory_size += len(audio)
+            while self._memory_size > self.memory_bytes:
+                _, evicted = self._memory.popitem(last=False)
+                self._memory_size -= len(evicted)
+
+    def _prune(self):
+        entries = sorted(self.directory.glob("*.mp3"), key=lambda path: path.stat().st_mtime)
+        for path in entries[:-self.max_entries]:
+            path.unlink(missing_ok=True)
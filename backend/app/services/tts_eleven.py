@@ -1,24 +1,157 @@
-import os, base64, requests
+import asyncio
+import base64
+import logging
+import os
+from pathlib import Path
+from typing import Dict, Optional
+
+import httpx
 from dotenv import load_dotenv
 
+from app.services.io_pool import run_io
+from app.services.tts_cache import TTSCache, tts_cache_key
+
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
 ELEVEN_BASE = "https://api.elevenlabs.io/v1"
+MODEL_ID = "eleven_multilingual_v2"
+VOICE_SETTINGS = {"stability": 0.4, "similarity_boost": 0.7}
+
+
+class TTSError(RuntimeError):
+    """Speech synthesis failed; `status_code` is the upstream HTTP status when there was one."""
+
+    def __init__(self, message: str, status_code: Optional[int] = None, retryable: bool = False):
+        super().__init__(message)
+        self.status_code = status_code
+        self.retryable = retryable
+
+
+class ElevenLabsTTS:
+    """ElevenLabs text-to-speech over one pooled, keep-alive HTTP client.
+
+    At most `max_concurrency` syntheses are in flight; further callers wait for
+    a slot rather than opening more connections. With a cache, repeated phrases
+    are served without a request and concurrent requests for the same audio
+    share one synthesis.
+    """
+
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        base_url: str = ELEVEN_BASE,
+        max_concurrency: Optional[int] = None,
+        timeout: Optional[float] = None,
+        cache: Optional[TTSCache] = None,
+    ):
+        self.api_key = api_key or os.getenv("ELEVENLABS_API_KEY")
+        self.base_url = base_url
+        self.max_concurrency = max(1, max_concurrency or int(os.getenv("TTS_MAX_CONCURRENCY", "4")))
+        self.timeout = timeout or float(os.getenv("TTS_TIMEOUT_SECONDS", "60"))
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        self._client: Optional[httpx.AsyncClient] = None
+        self.cache = cache
+        self._inflight: Dict[str, asyncio.Task] = {}
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url,
+                timeout=httpx.Timeout(self.timeout, connect=10.0),
+                limits=httpx.Limits(
+                    max_connections=self.max_concurrency,
+                    max_keepalive_connections=self.max_concurrency,
+                    keepalive_expiry=60.0,
+                ),
+            )
+        return self._client
+
+    async def synthesize(self, text: str, voice_id: str) -> bytes:
+        """Return mp3 bytes for `text`, raising TTSError on any failure."""
+        if self.cache is None:
+            return await self._request(text, voice_id)
+        key = tts_cache_key(text, voice_id, MODEL_ID, VOICE_SETTINGS)
+        audio = self.cache.get_memory(key)
+        if audio is None:
+            audio = await run_io(self.cache.get, key)
+        if audio is not None:
+            return audio
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.create_task(self._synthesize_and_store(key, text, voice_id))
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        # Shielded so one caller going away does not cancel the synthesis the others wait on.
+        return await asyncio.shield(task)
+
+    async def _synthesize_and_store(self, key: str, text: str, voice_id: str) -> bytes:
+        audio = await self._request(text, voice_id)
+        await run_io(self.cache.put, key, audio)
+        return audio
+
+    async def _request(self, text: str, voice_id: str) -> bytes:
+        if not self.api_key:
+            raise TTSError("ELEVENLABS_API_KEY not set")
+        headers = {
+            "xi-api-key": self.api_key,
+            "accept": "audio/mpeg",
+            "Content-Type": "application/json",
+        }
+        payload = {"text": text, "model_id": MODEL_ID, "voice_settings": VOICE_SETTINGS}
+        async with self._semaphore:
+            try:
+                r = await self.client.post(
+                    f"/text-to-speech/{voice_id}",
+                    params={"optimize_streaming_latency": 0},
+                    headers=headers,
+                    json=payload,
+                )
+            except httpx.TimeoutException as exc:
+                raise TTSError(f"ElevenLabs TTS timed out after {self.timeout:.0f}s", retryable=True) from exc
+            except httpx.HTTPError as exc:
+                raise TTSError(f"ElevenLabs TTS request failed: {exc}", retryable=True) from exc
+        if r.status_code >= 400:
+            detail = r.text[:500]
+            if r.status_code in (401, 403):
+                message = "ElevenLabs TTS rejected the API key"
+            elif r.status_code == 429:
+                message = "ElevenLabs TTS rate limit or quota exceeded"
+            else:
+                message = "ElevenLabs TTS failed"
+            raise TTSError(
+                f"{message} ({r.status_code}): {detail}",
+                status_code=r.status_code,
+                retryable=r.status_code == 429 or r.status_code >= 500,
+            )
+        return r.content
+
+    async def close(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+
+_tts: Optional[ElevenLabsTTS] = None
+
+
+def get_tts() -> ElevenLabsTTS:
+    global _tts
+    if _tts is None:
+        _tts = ElevenLabsTTS(cache=TTSCache(Path(os.getenv("TTS_CACHE_DIR", "/tmp/intent-tts-cache"))))
+    return _tts
+
+
+async def close_tts():
+    global _tts
+    if _tts is not None:
+        await _tts.close()
+        _tts = None
+
 
-def speak_text(text: str, voice_id: str) -> str:
+async def speak_text(text: str, voice_id: str) -> str:
     """Return base64 audio (mp3) generated by ElevenLabs TTS."""
-    api_key = os.getenv("ELEVENLABS_API_KEY")
-    url = f"{ELEVEN_BASE}/text-to-speech/{voice_id}?optimize_streaming_latency=0"
-    headers = {
-        "xi-api-key": api_key,
-        "accept": "audio/mpeg",
-        "Content-Type": "application/json"
-    }
-    payload = {
-        "text": text,
-        "model_id": "eleven_multilingual_v2",
-        "voice_settings": {"stability": 0.4, "similarity_boost": 0.7}
-    }
-    r = requests.post(url, headers=headers, json=payload, timeout=60)
-    r.raise_for_status()
-    return base64.b64encode(r.content).decode("utf-8")
+    audio = await get_tts().synthesize(text, voice_id)
+    return base64.b64encode(audio).decode("utf-8")
@@ -0,0 +1,72 @@
+import hashlib
+import json
+import logging
+import os
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Produced by the validators themselves; never part of a target's identity.
+IGNORED_DIRS = {"node_modules", "__pycache__", "dist", "build", ".next", ".cache"}
+
+
+def hash_tree(root: Path, extra: Iterable[str] = ()) -> str:
+    """sha256 over every file's relative path and content under `root`, plus `extra` strings."""
+    digest = hashlib.sha256()
+    for value in extra:
+        digest.update(value.encode("utf-8") + b"\0")
+    files = []
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames[:] = [name for name in dirnames if name not in IGNORED_DIRS]
+        files.extend(Path(dirpath) / name for name in filenames)
+    for path in sorted(files):
+        digest.update(path.relative_to(root).as_posix().encode("utf-8") + b"\0")
+        digest.update(hashlib.sha256(path.read_bytes()).digest())
+    return digest.hexdigest()
+
+
+class ValidationCache:
+    """On-disk cache of validation reports, one JSON file per target content hash."""
+
+    def __init__(self, directory: Path, max_entries: Optional[int] = None):
+        self.directory = Path(directory)
+        self.max_entries = max(1, max_entries or int(os.getenv("VALIDATION_CACHE_SIZE", "512")))
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str) -> Optional[List[Dict[str, Any]]]:
+        path = self.directory / f"{key}.json"
+        try:
+            reports = json.loads(path.read_text(encoding="utf-8"))
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+        except (OSError, ValueError) as exc:
+            logger.warning("Ignoring unreadable validation cache entry %s: %s", path, exc)
+            self.misses += 1
+            return None
+        # Touch so pruning keeps recently used entries.
+        os.utime(path)
+        self.hits += 1
+        return reports
+
+    def put(self, key: str, reports: List[Dict[str, Any]]):
+        path = self.directory / f"{key}.json"
+        try:
+            tmp_path = path.with_suffix(".json.tmp")
+            tmp_path.write_text(json.dumps(reports), encoding="utf-8")
+            tmp_path.replace(path)
+        except OSError as exc:
+            logger.warning("Could not write validation cache entry %s: %s", path, exc)
+            return
+        self._prune()
+
+    def stats(self) -> Dict[str, Any]:
+        return {"entries": len(list(self.directory.glob("*.json"))), "hits": self.hits, "misses": self.misses}
+
+    def _prune(self):
+        entries = sorted(self.directory.glob("*.json"), key=lambda path: path.stat().st_mtime)
+        for path in entries[:-self.max_entries]:
+            path.unlink(missing_ok=True)
@@ -0,0 +1,312 @@
+import asyncio
+import logging
+import os
+import re
+import signal
+import time
+from asyncio.subprocess import PIPE
+from collections import deque
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Deque, Dict, List, Optional, Sequence
+
+from app.services.io_pool import run_io
+from app.services.validation_cache import ValidationCache, hash_tree
+
+logger = logging.getLogger(__name__)
+
+OutputCallback = Callable[[str, str, str], None]
+
+# Part of each target's cache key: a toolchain upgrade invalidates earlier results.
+TOOLCHAIN_COMMANDS = {
+    "backend": [["python", "--version"]],
+    "frontend": [["node", "--version"], ["npm", "--version"]],
+}
+
+
+@dataclass
+class Validator:
+    target: str
+    cmd: List[str]
+    timeout: float
+    env: Dict[str, str] = field(default_factory=dict)
+
+
+class OutputTail:
+    """Keeps only the last `limit` bytes written to it."""
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        self.dropped = 0
+        self._chunks: Deque[bytes] = deque()
+        self._size = 0
+
+    def append(self, data: bytes):
+        self._chunks.append(data)
+        self._size += len(data)
+        while self._size > self.limit and self._chunks:
+            excess = self._size - self.limit
+            head = self._chunks[0]
+            if len(head) <= excess:
+                self._chunks.popleft()
+                self._size -= len(head)
+                self.dropped += len(head)
+            else:
+                self._chunks[0] = head[excess:]
+                self._size -= excess
+                self.dropped += excess
+
+    def text(self) -> str:
+        body = b"".join(self._chunks).decode("utf-8", errors="ignore")
+        if self.dropped:
+            return f"[... {self.dropped} earlier bytes truncated ...]\n" + body
+        return body
+
+
+class LogFile:
+    """Command log written off the event loop; output is buffered and flushed in chunks."""
+
+    def __init__(self, path: Path, flush_bytes: int = 64 * 1024):
+        self.path = path
+        self.flush_bytes = flush_bytes
+        self._handle = None
+        self._chunks: List[bytes] = []
+        self._size = 0
+        self._lock = asyncio.Lock()
+
+    async def open(self):
+        self._handle = await run_io(open, self.path, "wb")
+
+    async def write(self, data: bytes):
+        self._chunks.append(data)
+        self._size += len(data)
+        if self._size >= self.flush_bytes:
+            await self.flush()
+
+    async def flush(self):
+        async with self._lock:
+            if not self._chunks:
+                return
+            data = b"".join(self._chunks)
+            self._chunks = []
+            self._size = 0
+            await run_io(self._handle.write, data)
+
+    async def close(self):
+        try:
+            await self.flush()
+        finally:
+            await run_io(self._handle.close)
+
+
+class ValidationRunner:
+    """Runs a workspace's validators with per-command timeouts and bounded output capture.
+
+    Independent targets (backend, frontend) run concurrently; commands within a
+    target run in order. Each command gets its own process group so a timeout
+    takes down everything it spawned.
+    """
+
+    def __init__(
+        self,
+        timeout: Optional[float] = None,
+        install_timeout: Optional[float] = None,
+        output_limit: Optional[int] = None,
+        kill_grace: float = 5.0,
+        cache: Optional[ValidationCache] = None,
+        npm_cache_dir: Optional[Path] = None,
+    ):
+        self.timeout = timeout or float(os.getenv("VALIDATION_TIMEOUT_SECONDS", "300"))
+        self.install_timeout = install_timeout or float(os.getenv("VALIDATION_INSTALL_TIMEOUT_SECONDS", "600"))
+        self.output_limit = output_limit or int(os.getenv("VALIDATION_OUTPUT_LIMIT", str(64 * 1024)))
+        self.kill_grace = kill_grace
+        self.cache = cache
+        # Shared between builds so `npm install` resolves from disk instead of the registry.
+        self.npm_cache_dir = Path(npm_cache_dir) if npm_cache_dir else None
+        self._toolchains: Dict[str, str] = {}
+
+    def validators(self, workspace: Path) -> Dict[str, List[Validator]]:
+        targets: Dict[str, List[Validator]] = {}
+        if (workspace / "backend").exists():
+            targets["backend"] = [Validator("backend", ["python", "-m", "compileall", "-q", "."], self.timeout)]
+        if (workspace / "frontend" / "package.json").exists():
+            npm_env = {"npm_config_cache": str(self.npm_cache_dir)} if self.npm_cache_dir else {}
+            install = ["npm", "install", "--ignore-scripts", "--no-audit", "--no-fund"]
+            if self.npm_cache_dir:
+                install.append("--prefer-offline")
+            targets["frontend"] = [
+                Validator("frontend", install, self.install_timeout, npm_env),
+                Validator("frontend", ["npm", "run", "build"], self.timeout, npm_env),
+            ]
+        return targets
+
+    async def run(
+        self,
+        workspace: Path,
+        log_dir: Optional[Path] = None,
+        on_output: Optional[OutputCallback] = None,
+        targets: Optional[Sequence[str]] = None,
+    ) -> List[Dict[str, Any]]:
+        plan = {
+            target: validators
+            for target, validators in self.validators(workspace).items()
+            if targets is None or target in targets
+        }
+        if log_dir is not None:
+            await run_io(log_dir.mkdir, parents=True, exist_ok=True)
+        results = await asyncio.gather(*(
+            self._run_target(target, workspace / target, validators, log_dir, on_output)
+            for target, validators in plan.items()
+        ))
+        return [report for reports in results for report in reports]
+
+    async def _run_target(
+        self,
+        target: str,
+        cwd: Path,
+        validators: List[Validator],
+        log_dir: Optional[Path],
+        on_output: Optional[OutputCallback],
+    ) -> List[Dict[str, Any]]:
+        key = None
+        if self.cache is not None:
+            toolchain = await self._toolchain(target)
+            commands = [" ".join(validator.cmd) for validator in validators]
+            key = await run_io(hash_tree, cwd, [target, toolchain, *commands])
+            cached = await run_io(self.cache.get, key)
+            if cached is not None:
+                logger.info("Reusing cached %s validation (%s)", target, key[:12])
+                return [{**report, "cwd": str(cwd), "cached": True} for report in cached]
+        reports = []
+        for idx, validator in enumerate(validators):
+            log_path = None
+            if log_dir is not None:
+                slug = re.sub(r"[^a-z0-9]+", "-", " ".join(validator.cmd).lower()).strip("-")
+                log_path = log_dir / f"{validator.target}-{idx}-{slug}.log"
+            report = await self.run_command(
+                validator.cmd, cwd, validator.timeout, log_path, on_output, env=validator.env
+            )
+            report["target"] = validator.target
+            reports.append(report)
+            if report["returncode"] != 0:
+                # Later steps depend on earlier ones (no build without an install).
+                break
+        # Only clean passes are cached; failures may be flaky (network, registry) and should rerun.
+        if key is not None and reports and all(report["returncode"] == 0 for report in reports):
+            await run_io(self.cache.put, key, reports)
+        return reports
+
+    async def _toolchain(self, target: str) -> str:
+        if target not in self._toolchains:
+            versions = []
+            for cmd in TOOLCHAIN_COMMANDS.get(target, []):
+                try:
+                    proc = await asyncio.create_subprocess_exec(*cmd, stdout=PIPE, stderr=PIPE)
+                    stdout, stderr = await asyncio.wait_for(proc.communicate(), 30)
+                    versions.append((stdout or stderr).decode("utf-8", errors="ignore").strip())
+                except (OSError, asyncio.TimeoutError):
+                    versions.append(f"{cmd[0]} unavailable")
+            self._toolchains[target] = " ".join(versions)
+        return self._toolchains[target]
+
+    async def run_command(
+        self,
+        cmd: List[str],
+        cwd: Path,
+        timeout: float,
+        log_path: Optional[Path] = None,
+        on_output: Optional[OutputCallback] = None,
+        env: Optional[Dict[str, str]] = None,
+    ) -> Dict[str, Any]:
+        command = " ".join(cmd)
+        started = time.monotonic()
+        started_at = datetime.utcnow().isoformat() + "Z"
+        try:
+            proc = await asyncio.create_subprocess_exec(
+                *cmd,
+                cwd=str(cwd),
+                stdout=PIPE,
+                stderr=PIPE,
+                start_new_session=True,
+                env={**os.environ, **env} if env else None,
+            )
+        except FileNotFoundError as exc:
+            return {
+                "command": command,
+                "cwd": str(cwd),
+                "returncode": -1,
+                "stdout": "",
+                "stderr": f"{exc}",
+                "timed_out": False,
+                "duration_seconds": 0.0,
+                "started_at": started_at,
+                "ended_at": started_at,
+                "log_path": None,
+            }
+
+        tails = {"stdout": OutputTail(self.output_limit), "stderr": OutputTail(self.output_limit)}
+        log = LogFile(log_path) if log_path else None
+        if log:
+            await log.open()
+
+        async def pump(stream: asyncio.StreamReader, name: str):
+            while True:
+                try:
+                    line = await stream.readline()
+                except ValueError:
+                    # Line longer than the stream limit; asyncio has already discarded it.
+                    line = b"[output line truncated]\n"
+                if not line:
+                    return
+                tails[name].append(line)
+                if log:
+                    await log.write(line if name == "stdout" else b"[stderr] " + line)
+                if on_output:
+                    on_output(command, name, line.decode("utf-8", errors="ignore").rstrip("\n"))
+
+        async def communicate():
+            await asyncio.gather(pump(proc.stdout, "stdout"), pump(proc.stderr, "stderr"))
+            await proc.wait()
+
+        timed_out = False
+        try:
+            await asyncio.wait_for(communicate(), timeout)
+        except asyncio.TimeoutError:
+            timed_out = True
+            logger.warning("Validation command %r timed out after %.0fs in %s", command, timeout, cwd)
+            await self._kill(proc)
+        except asyncio.CancelledError:
+            await self._kill(proc)
+            raise
+        finally:
+            if log:
+                await log.close()
+
+        stderr = tails["stderr"].text()
+        if timed_out:
+            stderr += f"\n[killed after {timeout:.0f}s timeout]"
+        return {
+            "command": command,
+            "cwd": str(cwd),
+            "returncode": proc.returncode if not timed_out else -signal.SIGKILL,
+            "stdout": tails["stdout"].text(),
+            "stderr": stderr,
+            "timed_out": timed_out,
+            "duration_seconds": round(time.monotonic() - started, 3),
+            "started_at": started_at,
+            "ended_at": datetime.utcnow().isoformat() + "Z",
+            "log_path": str(log_path) if log_path else None,
+        }
+
+    async def _kill(self, proc: asyncio.subprocess.Process):
+        for sig in (signal.SIGTERM, signal.SIGKILL):
+            try:
+                os.killpg(proc.pid, sig)
+            except ProcessLookupError:
+                return
+            try:
+                await asyncio.wait_for(proc.wait(), self.kill_grace)
+                return
+            except asyncio.TimeoutError:
+                continue
@@ -0,0 +1,128 @@
+"""
+Benchmark: event-loop lag seen by interactive traffic while a build writes its
+workspace, packages its archive and checkpoints its record to the queue database.
+
+A probe coroutine stands in for chat/WebSocket handlers: it sleeps for a short
+tick and records how late it wakes up. "inline" runs the build's filesystem,
+archive and SQLite steps directly on the loop (the previous behaviour of
+BuildManager); "executor" runs them through the build I/O thread pool and the
+queue thread as BuildManager does now.
+
+    cd backend && python -m benchmarks.bench_event_loop_lag --files 300 --kb 64
+"""
+import argparse
+import asyncio
+import random
+import shutil
+import statistics
+import string
+import tempfile
+import time
+from pathlib import Path
+
+from app.services.build_manager import BuildManager
+from app.services.io_pool import run_io, shutdown_io_executor
+
+TICK = 0.005
+# One checkpoint per stage entry and completion.
+CHECKPOINTS = 8
+
+
+def _spec(files: int, kb: int):
+    rng = random.Random(7)
+    alphabet = string.ascii_letters + string.digits + " \n"
+    return {
+        "project_name": "Lag benchmark",
+        "stack": {"frontend": "React", "backend": "FastAPI"},
+        "instructions": {"setup": [], "run": []},
+        "files": [
+            {
+                "path": f"{'backend' if idx % 2 else 'frontend'}/module_{idx}.txt",
+                "content": "".join(rng.choices(alphabet, k=kb * 1024)),
+            }
+            for idx in range(files)
+        ],
+    }
+
+
+async def _probe(samples, stop: asyncio.Event):
+    loop = asyncio.get_running_loop()
+    while not stop.is_set():
+        start = loop.time()
+        await asyncio.sleep(TICK)
+        samples.append(loop.time() - start - TICK)
+
+
+def _record(spec, idx: int):
+    return {"build_id": f"lag-{idx}", "session_id": "lag", "status": "generating", "spec": spec}
+
+
+async def _build_inline(manager: BuildManager, root: Path, spec, idx: int):
+    record = _record(spec, idx)
+    for _ in range(CHECKPOINTS):
+        manager.queue.save(record)
+    workspace = root / f"{idx}_workspace"
+    manager._prepare_workspace(workspace, spec, "context")
+    manager._package(root / f"{idx}.zip", spec, "context")
+    shutil.rmtree(workspace, ignore_errors=True)
+
+
+async def _build_executor(manager: BuildManager, root: Path, spec, idx: int):
+    record = _record(spec, idx)
+    for _ in range(CHECKPOINTS):
+        manager._persist(record)
+    workspace = root / f"{idx}_workspace"
+    await run_io(manager._prepare_workspace, workspace, spec, "context")
+    await run_io(manager._package, root / f"{idx}.zip", spec, "context")
+    await run_io(shutil.rmtree, workspace, ignore_errors=True)
+    await manager._queue_call(lambda: None)
+
+
+async def _measure(build, manager: BuildManager, spec, builds: int):
+    samples = []
+    stop = asyncio.Event()
+    with tempfile.TemporaryDirectory() as tmp:
+        probe = asyncio.create_task(_probe(samples, stop))
+        start = time.perf_counter()
+        for idx in range(builds):
+            await build(manager, Path(tmp), spec, idx)
+            # Let the probe observe the loop between builds as a real worker would.
+            await asyncio.sleep(0)
+        elapsed = time.perf_counter() - start
+        stop.set()
+        await probe
+    samples.sort()
+    return elapsed, samples
+
+
+def _report(label: str, elapsed: float, samples):
+    p50 = statistics.median(samples) * 1000
+    p99 = samples[int(0.99 * (len(samples) - 1))] * 1000
+    print(
+        f"{label:9s} build time {elapsed:6.2f} s | probe lag p50 {p50:7.2f} ms  "
+        f"p99 {p99:7.2f} ms  max {samples[-1] * 1000:7.2f} ms  (n={len(samples)})"
+    )
+
+
+async def main_async(files: int, kb: int, builds: int):
+    with tempfile.TemporaryDirectory() as artifacts:
+        manager = BuildManager(session_store=None, artifacts_dir=Path(artifacts), api_key_override="unused")
+        spec = _spec(files, kb)
+        print(f"files={files} size={kb}KB builds={builds} tick={TICK * 1000:.0f}ms")
+        _report("inline", *await _measure(_build_inline, manager, spec, builds))
+        _report("executor", *await _measure(_build_executor, manager, spec, builds))
+        manager.queue.close()
+    shutdown_io_executor()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--files", type=int, default=300)
+    parser.add_argument("--kb", type=int, default=64)
+    parser.add_argument("--builds", type=int, default=3)
+    args = parser.parse_args()
+    asyncio.run(main_async(args.files, args.kb, args.builds))
+
+
+if __name__ == "__main__":
+    main()
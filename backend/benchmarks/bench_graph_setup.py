@@ -0,0 +1,87 @@
+"""
+Benchmark: per-run LangGraph setup overhead in AgentRuntime.
+
+"before" builds and compiles the StateGraph for every run (the previous
+behaviour of AgentRuntime.run); "after" reuses the graph compiled once in
+AgentRuntime.__init__. The LLM is replaced by an instant in-process responder
+so the numbers isolate orchestration cost.
+
+    cd backend && python -m benchmarks.bench_graph_setup --runs 200
+"""
+import argparse
+import asyncio
+import copy
+import statistics
+import time
+
+from app.agents.dev_swarm import AgentRuntime
+from app.schemas import REQUIREMENTS_TEMPLATE
+
+TEAM_PLAN = {
+    "rounds": 2,
+    "shared_objective": "Benchmark",
+    "agents": [{"id": f"agent-{i}", "name": f"Agent {i}", "focus": ["Benchmark"]} for i in range(4)],
+}
+BRIEF = {"project": {"title": "Benchmark project"}}
+
+
+class InstantLLM:
+    async def chat(self, system, messages, **kwargs):
+        return "Use FastAPI and Postgres."
+
+    async def extract_json(self, prompt, conversation, **kwargs):
+        return {"technical": {"stack_preferences": ["FastAPI", "Postgres"]}}
+
+
+async def _run_before(runtime: AgentRuntime):
+    graph = runtime._build_graph()
+    state = {
+        "brief": BRIEF,
+        "history": [],
+        "requirements": copy.deepcopy(REQUIREMENTS_TEMPLATE),
+        "round": 0,
+        "max_rounds": 2,
+        "team_plan": TEAM_PLAN,
+        "digest": [],
+        "round_messages": [],
+    }
+    return await graph.ainvoke(state)
+
+
+async def _run_after(runtime: AgentRuntime):
+    return await runtime.run(TEAM_PLAN, BRIEF)
+
+
+async def _measure(fn, runtime: AgentRuntime, runs: int):
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        await fn(runtime)
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+async def main_async(runs: int):
+    runtime = AgentRuntime(InstantLLM(), aggregation_mode="full")
+    compile_samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        runtime._build_graph()
+        compile_samples.append(time.perf_counter() - start)
+    before = await _measure(_run_before, runtime, runs)
+    after = await _measure(_run_after, runtime, runs)
+    print(f"runs={runs}")
+    print(f"graph build+compile alone : median {statistics.median(compile_samples) * 1000:7.2f} ms")
+    print(f"run, compile per call     : median {statistics.median(before) * 1000:7.2f} ms")
+    print(f"run, compiled once        : median {statistics.median(after) * 1000:7.2f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--runs", type=int, default=200)
+    args = parser.parse_args()
+    asyncio.run(main_async(args.runs))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""
+Micro-benchmark: per-round requirements merge as lists grow into the hundreds.
+
+Compares the previous AgentRuntime approach (deepcopy the whole document every
+round, rebuild each list's dedup set with json.dumps) against RequirementsDocument
+(fork + persistent dedup index).
+
+    cd backend && python -m benchmarks.bench_requirements_merge --rounds 40 --agents 5
+"""
+import argparse
+import copy
+import json
+import time
+
+from app.schemas import REQUIREMENTS_TEMPLATE
+from app.services.requirements_merge import RequirementsDocument
+
+
+def _legacy_merge(base, updates):
+    for key, value in updates.items():
+        if isinstance(value, dict):
+            node = base.setdefault(key, {})
+            if isinstance(node, dict):
+                _legacy_merge(node, value)
+            else:
+                base[key] = value
+        elif isinstance(value, list):
+            node = base.setdefault(key, [])
+            if isinstance(node, list):
+                seen = set()
+                merged = []
+                for item in node + value:
+                    item_key = json.dumps(item, sort_keys=True) if isinstance(item, (dict, list)) else str(item)
+                    if item_key in seen:
+                        continue
+                    seen.add(item_key)
+                    merged.append(item)
+                base[key] = merged
+            else:
+                base[key] = value
+        else:
+            base[key] = value
+
+
+def _patch(round_idx: int, agent_idx: int, items: int):
+    tag = f"r{round_idx}a{agent_idx}"
+    return {
+        "product": {"features": [f"feature {tag}-{i}" for i in range(items)] + ["shared feature"]},
+        "technical": {
+            "data_model_hints": [{"entity": f"{tag}-{i}", "fields": ["id", "name"]} for i in range(items)],
+            "integrations": ["Stripe", f"integration {tag}"],
+        },
+        "constraints": {"risks": [{"item": f"risk {tag}", "mitigation": "monitor"}]},
+        "notes": [f"note {tag}"],
+    }
+
+
+def bench_legacy(rounds: int, agents: int, items: int) -> float:
+    requirements = copy.deepcopy(REQUIREMENTS_TEMPLATE)
+    start = time.perf_counter()
+    for round_idx in range(rounds):
+        requirements = copy.deepcopy(requirements)
+        for agent_idx in range(agents):
+            _legacy_merge(requirements, _patch(round_idx, agent_idx, items))
+    return time.perf_counter() - start
+
+
+def bench_document(rounds: int, agents: int, items: int) -> float:
+    document = RequirementsDocument(copy.deepcopy(REQUIREMENTS_TEMPLATE))
+    start = time.perf_counter()
+    for round_idx in range(rounds):
+        document = document.fork()
+        for agent_idx in range(agents):
+            document.merge(_patch(round_idx, agent_idx, items))
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rounds", type=int, default=40)
+    parser.add_argument("--agents", type=int, default=5)
+    parser.add_argument("--items", type=int, default=3, help="new list items per agent patch")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    legacy = min(bench_legacy(args.rounds, args.agents, args.items) for _ in range(args.repeat))
+    document = min(bench_document(args.rounds, args.agents, args.items) for _ in range(args.repeat))
+    final_features = args.rounds * args.agents * args.items + 1
+    print(f"rounds={args.rounds} agents={args.agents} final feature count={final_features}")
+    print(f"legacy deepcopy + json dedup : {legacy * 1000:8.2f} ms")
+    print(f"RequirementsDocument         : {document * 1000:8.2f} ms")
+    print(f"speedup                      : {legacy / document:8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
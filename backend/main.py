@@ -1,15 +1,17 @@
-from fastapi import FastAPI, WebSocket, WebSocketDisconnect
+from fastapi import FastAPI, Request, Response, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 import json
 import asyncio
 from typing import List
 import io
+import hashlib
 import zipfile
+from functools import lru_cache
 
 from agents.swarm import SwarmManager
 from agents.simulator import DebateSimulator
+from app.services.downloads import etag_matches
 
 app = FastAPI(title="AI Swarm Arena API")
 
@@ -162,12 +164,11 @@ async def websocket_endpoint(websocket: WebSocket):
         print(f"Client disconnected. Active connections: {len(manager.active_connections)}")
 
 # Download artifact endpoint
-@app.get("/api/download")
-async def download_artifact():
+@lru_cache(maxsize=1)
+def build_scaffold_archive():
     """
-    Generates and returns a ZIP file with mock project scaffold
+    Builds the mock project scaffold ZIP once; returns (bytes, strong ETag)
     """
-    # Create in-memory ZIP file
     zip_buffer = io.BytesIO()
     
     with zipfile.ZipFile(zip_buffer, 'w', zipfile.ZIP_DEFLATED) as zip_file:
@@ -219,14 +220,25 @@ console.log("Welcome to your AI-generated project!");
 
 // TODO: Add your application logic here
 ''')
-    
-    zip_buffer.seek(0)
-    
-    return StreamingResponse(
-        io.BytesIO(zip_buffer.getvalue()),
-        media_type="application/zip",
-        headers={"Content-Disposition": "attachment; filename=ai-swarm-project.zip"}
-    )
+
+    data = zip_buffer.getvalue()
+    return data, '"' + hashlib.sha256(data).hexdigest() + '"'
+
+@app.get("/api/download")
+async def download_artifact(request: Request):
+    """
+    Returns a ZIP file with mock project scaffold
+    """
+    data, etag = build_scaffold_archive()
+    headers = {
+        "Content-Disposition": "attachment; filename=ai-swarm-project.zip",
+        "ETag": etag,
+        "Cache-Control": "public, max-age=3600",
+    }
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+
+    return Response(content=data, media_type="application/zip", headers=headers)
 
 if __name__ == "__main__":
     import uvicorn
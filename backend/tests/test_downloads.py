@@ -0,0 +1,64 @@
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.services.downloads import SendfileFileResponse, etag_matches
+
+ETAG = '"' + "ab" * 32 + '"'
+LAST_MODIFIED = "Mon, 19 Oct 2026 04:00:00 GMT"
+BODY = bytes(range(256)) * 4
+
+
+def make_client(tmp_path):
+    archive = tmp_path / "archive.zip"
+    archive.write_bytes(BODY)
+    app = FastAPI()
+
+    @app.get("/download")
+    def download():
+        return SendfileFileResponse(
+            archive,
+            media_type="application/zip",
+            headers={"ETag": ETAG, "Last-Modified": LAST_MODIFIED},
+            stat_result=archive.stat(),
+        )
+
+    return TestClient(app)
+
+
+def test_range_without_if_range(tmp_path):
+    response = make_client(tmp_path).get("/download", headers={"Range": "bytes=0-9"})
+    assert response.status_code == 206
+    assert response.content == BODY[:10]
+
+
+def test_range_with_served_etag_resumes(tmp_path):
+    client = make_client(tmp_path)
+    etag = client.get("/download").headers["etag"]
+    assert etag == ETAG
+    response = client.get("/download", headers={"Range": "bytes=10-19", "If-Range": etag})
+    assert response.status_code == 206
+    assert response.headers["content-range"] == f"bytes 10-19/{len(BODY)}"
+    assert response.content == BODY[10:20]
+
+
+def test_range_with_served_last_modified_resumes(tmp_path):
+    client = make_client(tmp_path)
+    last_modified = client.get("/download").headers["last-modified"]
+    response = client.get("/download", headers={"Range": "bytes=0-9", "If-Range": last_modified})
+    assert response.status_code == 206
+
+
+def test_range_with_stale_or_weak_validator_sends_full_body(tmp_path):
+    client = make_client(tmp_path)
+    for validator in ('"other"', "W/" + ETAG, "Tue, 20 Oct 2026 04:00:00 GMT"):
+        response = client.get("/download", headers={"Range": "bytes=0-9", "If-Range": validator})
+        assert response.status_code == 200
+        assert response.content == BODY
+
+
+def test_etag_matches():
+    assert etag_matches(ETAG, ETAG)
+    assert etag_matches('"x", W/' + ETAG, ETAG)
+    assert etag_matches("*", ETAG)
+    assert not etag_matches(None, ETAG)
+    assert not etag_matches('"x"', ETAG)
@@ -0,0 +1,31 @@
+import asyncio
+
+from app.services.llm_scheduler import LLMScheduler
+
+
+def test_builds_leave_reserved_slots_for_interactive_calls():
+    async def scenario():
+        scheduler = LLMScheduler(max_in_flight=8, interactive_reserved=2, planning_reserved=1)
+        release = asyncio.Event()
+        builds = [
+            asyncio.create_task(scheduler.run("build", release.wait, session_id=f"build-{idx % 2}"))
+            for idx in range(8)
+        ]
+        await asyncio.sleep(0)
+        assert scheduler.stats()["classes"]["build"]["running"] == 5
+        assert scheduler.stats()["classes"]["build"]["waiting"] == 3
+
+        # Admitted immediately even though builds are queued and their calls never finish on their own.
+        reply = await asyncio.wait_for(scheduler.run("interactive", lambda: asyncio.sleep(0, "ok")), 1)
+        assert reply == "ok"
+
+        release.set()
+        await asyncio.gather(*builds)
+        assert scheduler.stats()["in_flight"] == 0
+
+    asyncio.run(scenario())
+
+
+def test_every_class_keeps_a_slot_when_the_pool_is_tiny():
+    scheduler = LLMScheduler(max_in_flight=1, interactive_reserved=2, planning_reserved=1)
+    assert scheduler.limits == {"interactive": 1, "planning": 1, "build": 1}